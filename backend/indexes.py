@@ -0,0 +1,56 @@
+"""Index management CLI.
+
+Run from the backend directory:
+
+    python -m indexes ensure   # create missing indexes and run data migrations
+    python -m indexes report   # list missing, unexpected and unused indexes
+
+Usage counts come from $indexStats and reset when mongod restarts, so an
+index reported as unused has not been used since the last restart.
+"""
+import argparse
+import asyncio
+import sys
+
+from server import INDEX_SPECS, client, db, run_migrations
+
+
+async def ensure():
+    await run_migrations()
+    print("Indexes and migrations are up to date")
+    return 0
+
+
+async def report():
+    problems = 0
+    for collection, indexes in INDEX_SPECS.items():
+        expected = {index.document["name"] for index in indexes}
+        existing = await db[collection].index_information()
+        stats = {
+            stat["name"]: stat["accesses"]["ops"]
+            async for stat in db[collection].aggregate([{"$indexStats": {}}])
+        }
+
+        print(f"{collection}:")
+        for name in sorted(expected - set(existing)):
+            print(f"  missing     {name}")
+            problems += 1
+        for name in sorted(set(existing) - expected - {"_id_"}):
+            print(f"  unexpected  {name}")
+        for name in sorted(set(existing) - {"_id_"}):
+            if stats.get(name, 0) == 0:
+                print(f"  unused      {name}")
+        if expected <= set(existing):
+            print("  all expected indexes present")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes")
+    parser.add_argument("command", choices=["ensure", "report"])
+    args = parser.parse_args()
+    try:
+        exit_code = asyncio.run(ensure() if args.command == "ensure" else report())
+    finally:
+        client.close()
+    sys.exit(exit_code)
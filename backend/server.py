@@ -1,19 +1,33 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Depends
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import os
 import logging
+import socket
+import importlib.util
+import time
+from collections import OrderedDict
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple, AsyncIterator, Iterator, Set
 import uuid
 from datetime import datetime, timezone, timedelta
 import httpx
 import asyncio
 import base64
+import hashlib
+import heapq
 import json
+import random
+import re
+import shutil
+from contextlib import aclosing, asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -21,6 +35,117 @@ load_dotenv(ROOT_DIR / '.env')
 VIDEOS_DIR = ROOT_DIR / "videos"
 VIDEOS_DIR.mkdir(exist_ok=True)
 
+BLOBS_DIR = ROOT_DIR / "blobs"
+BLOBS_DIR.mkdir(exist_ok=True)
+
+# Clips re-encoded for concatenation, keyed by source clip hash and target spec
+NORMALIZED_DIR = ROOT_DIR / "normalized"
+NORMALIZED_DIR.mkdir(exist_ok=True)
+
+# Versioned image URLs (?v=<digest prefix>) never change content, so they can be cached forever.
+# Set to "public, ..." when a CDN sits in front of the API.
+IMAGE_CACHE_CONTROL = os.environ.get("IMAGE_CACHE_CONTROL", "private, max-age=31536000, immutable")
+
+# Background job queue settings
+JOB_WORKERS_IN_PROCESS = int(os.environ.get("JOB_WORKERS_IN_PROCESS", "2"))
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_HEARTBEAT_SECONDS = int(os.environ.get("JOB_HEARTBEAT_SECONDS", "15"))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "2"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY_SECONDS = int(os.environ.get("JOB_RETRY_DELAY_SECONDS", "30"))
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", str(7 * 24 * 60 * 60)))
+
+# Script decomposition
+DECOMPOSE_MODEL = "gemini-2.0-flash"
+# Bump whenever the decomposition prompt changes so cached results are not reused
+DECOMPOSE_PROMPT_VERSION = "2"
+DECOMPOSE_CACHE_TTL_SECONDS = int(os.environ.get("DECOMPOSE_CACHE_TTL_SECONDS", str(30 * 24 * 60 * 60)))
+DECOMPOSE_CACHE_MAX_ENTRIES = int(os.environ.get("DECOMPOSE_CACHE_MAX_ENTRIES", "5000"))
+# Scene image generation
+IMAGE_MODEL = "gemini-3-pro-image-preview"
+IMAGE_MODEL_PARAMS = {"modalities": ["image", "text"]}
+IMAGE_GEN_CACHE_TTL_SECONDS = int(os.environ.get("IMAGE_GEN_CACHE_TTL_SECONDS", str(90 * 24 * 60 * 60)))
+IMAGE_GEN_CACHE_MAX_ENTRIES = int(os.environ.get("IMAGE_GEN_CACHE_MAX_ENTRIES", "20000"))
+# Script segments (the unit of incremental re-decomposition)
+SEGMENT_MIN_CHARS = int(os.environ.get("SEGMENT_MIN_CHARS", "600"))
+SEGMENT_MAX_CHARS = int(os.environ.get("SEGMENT_MAX_CHARS", "4000"))
+DECOMPOSE_CONCURRENCY = int(os.environ.get("DECOMPOSE_CONCURRENCY", "4"))
+# Scripts longer than this are decomposed in concurrent chunks of at most this size
+DECOMPOSE_CHUNK_CHARS = int(os.environ.get("DECOMPOSE_CHUNK_CHARS", "8000"))
+
+# Caps on concurrent scene generations within one process
+GENERATION_GLOBAL_CONCURRENCY = int(os.environ.get("GENERATION_GLOBAL_CONCURRENCY", "8"))
+GENERATION_PER_USER_CONCURRENCY = int(os.environ.get("GENERATION_PER_USER_CONCURRENCY", "3"))
+
+# Threads reserved for blocking google-genai work (clip downloads/writes)
+VEO_THREAD_POOL_SIZE = int(os.environ.get("VEO_THREAD_POOL_SIZE", "4"))
+VEO_MODEL = os.environ.get("VEO_MODEL", "veo-2.0-generate-preview")
+
+# Outbound HTTP
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1"
+AUTH_SESSION_URL = "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_PER_HOST = int(os.environ.get("HTTP_MAX_KEEPALIVE_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# Provider rate limits: starting requests per minute for each (API key, model)
+PROVIDER_RATE_LIMITS_RPM = {
+    DECOMPOSE_MODEL: float(os.environ.get("DECOMPOSE_RPM", "60")),
+    IMAGE_MODEL: float(os.environ.get("IMAGE_RPM", "10")),
+    VEO_MODEL: float(os.environ.get("VEO_RPM", "2")),
+}
+RATE_LIMIT_DEFAULT_RPM = float(os.environ.get("RATE_LIMIT_DEFAULT_RPM", "30"))
+# Requests that may be sent back to back after an idle period
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", "3"))
+# Adaptive rates never go above this multiple of the starting rate
+RATE_LIMIT_MAX_BOOST = float(os.environ.get("RATE_LIMIT_MAX_BOOST", "2"))
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get("RATE_LIMIT_MAX_WAIT_SECONDS", "300"))
+# Calls made while an HTTP request waits (key validation, decomposition, login) answer 429 past this instead
+RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS = float(os.environ.get("RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS", "10"))
+RATE_LIMIT_MAX_RETRIES = int(os.environ.get("RATE_LIMIT_MAX_RETRIES", "3"))
+RATE_LIMIT_DEFAULT_RETRY_AFTER = float(os.environ.get("RATE_LIMIT_DEFAULT_RETRY_AFTER", "10"))
+
+# Provider retries and circuit breakers
+PROVIDER_RETRY_ATTEMPTS = int(os.environ.get("PROVIDER_RETRY_ATTEMPTS", "3"))
+PROVIDER_RETRY_BASE_DELAY = float(os.environ.get("PROVIDER_RETRY_BASE_DELAY", "1"))
+PROVIDER_RETRY_MAX_DELAY = float(os.environ.get("PROVIDER_RETRY_MAX_DELAY", "30"))
+# Consecutive transient failures that open a provider's circuit
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.environ.get("CIRCUIT_RESET_SECONDS", "30"))
+
+# Authenticated-request cache
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("SESSION_CACHE_TTL_SECONDS", "60"))
+SESSION_CACHE_MAX_ENTRIES = int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", "10000"))
+# Requires a replica set; lets every worker see logouts and settings changes made by the others
+SESSION_CACHE_CHANGE_STREAM = os.environ.get("SESSION_CACHE_CHANGE_STREAM", "false").lower() == "true"
+
+# Idempotency-Key handling for generation and assembly endpoints
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60)))
+# How long a duplicate waits for the original request before answering 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "600"))
+# An in-progress key older than this is assumed abandoned (its process died) and may be taken over
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "900"))
+
+# Media pool: threads given to each ffmpeg process, and how many run at once (default fills the cores)
+FFMPEG_THREADS = int(os.environ.get("FFMPEG_THREADS", "2"))
+MEDIA_POOL_SLOTS = int(os.environ.get("MEDIA_POOL_SLOTS", str(max(1, (os.cpu_count() or 2) // FFMPEG_THREADS))))
+# Waiting ffmpeg runs beyond this are refused with 503 rather than queued
+MEDIA_POOL_MAX_QUEUE = int(os.environ.get("MEDIA_POOL_MAX_QUEUE", "64"))
+NORMALIZED_CACHE_MAX_BYTES = int(os.environ.get("NORMALIZED_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+
+# HLS/DASH packaging of assembled and scene videos
+STREAM_PACKAGING_AFTER_ASSEMBLY = os.environ.get("STREAM_PACKAGING_AFTER_ASSEMBLY", "false").lower() == "true"
+STREAM_DASH = os.environ.get("STREAM_DASH", "false").lower() == "true"
+STREAM_SEGMENT_SECONDS = int(os.environ.get("STREAM_SEGMENT_SECONDS", "4"))
+# Stream paths are versioned by source content, so their files never change
+STREAM_CACHE_CONTROL = os.environ.get("STREAM_CACHE_CONTROL", "private, max-age=31536000, immutable")
+
+# Project event stream
+PROJECT_EVENTS_QUEUE_SIZE = int(os.environ.get("PROJECT_EVENTS_QUEUE_SIZE", "256"))
+PROJECT_EVENTS_KEEPALIVE_SECONDS = float(os.environ.get("PROJECT_EVENTS_KEEPALIVE_SECONDS", "15"))
+# Requires a replica set; needed when jobs run in other processes (python -m worker, several API workers)
+PROJECT_EVENTS_CHANGE_STREAM = os.environ.get("PROJECT_EVENTS_CHANGE_STREAM", "false").lower() == "true"
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
@@ -39,6 +164,576 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ==================== HTTP CLIENT POOL ====================
+
+class HttpClientPool:
+    """Application-lifetime httpx clients, one per upstream host.
+
+    httpx caps connections per client rather than per host, so each host gets
+    its own client and therefore its own connection limit. Connections are
+    kept alive between requests, and HTTP/2 is used when `h2` is installed.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._http2 = importlib.util.find_spec("h2") is not None
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        host = httpx.URL(url).host
+        http_client = self._clients.get(host)
+        if http_client is None or http_client.is_closed:
+            http_client = httpx.AsyncClient(
+                http2=self._http2,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+            self._clients[host] = http_client
+        return http_client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.get(url).request(method, url, **kwargs)
+
+    async def aclose(self):
+        await asyncio.gather(*(c.aclose() for c in self._clients.values()), return_exceptions=True)
+        self._clients.clear()
+
+http_pool = HttpClientPool()
+
+# ==================== PROVIDER RATE LIMITS ====================
+#
+# Every Gemini/Veo call first takes a token from the bucket for its (API key,
+# model) pair; callers over the rate wait in FIFO order instead of sending a
+# request that would be refused. Rates adapt AIMD-style: a 429 halves the rate
+# and pauses the bucket for Retry-After, and each success adds back a small
+# step, up to RATE_LIMIT_MAX_BOOST times the configured starting rate.
+
+class ProviderBackoff(HTTPException):
+    """A provider call should not be attempted again for retry_after seconds"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+        )
+
+class ProviderRateLimited(ProviderBackoff):
+    """The provider is refusing requests for this key and model"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(429, "AI provider rate limit reached, please retry shortly", retry_after)
+
+class TokenBucket:
+    def __init__(self, rpm: float):
+        self.base_rate = rpm / 60
+        self.rate = self.base_rate
+        self.capacity = max(1, RATE_LIMIT_BURST)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        # FIFO: asyncio.Lock wakes waiters in arrival order
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available"""
+        now = time.monotonic()
+        self._refill(now)
+        blocked = max(0.0, self.blocked_until - now)
+        shortfall = max(0.0, 1 - self.tokens) / self.rate
+        return max(blocked, shortfall)
+
+    def take(self):
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def penalize(self, retry_after: float):
+        self.rate = max(self.base_rate / 8, self.rate / 2)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def reward(self):
+        self.rate = min(self.base_rate * RATE_LIMIT_MAX_BOOST, self.rate + self.base_rate / 10)
+
+class ProviderRateLimiter:
+    """Token buckets per (API key, model), created on first use"""
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def bucket(self, api_key: str, model: str) -> TokenBucket:
+        # Keys are only held as a hash
+        key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16], model)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(PROVIDER_RATE_LIMITS_RPM.get(model, RATE_LIMIT_DEFAULT_RPM))
+        return bucket
+
+    async def acquire(self, api_key: str, model: str, max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS):
+        """Wait for a request slot, raising ProviderRateLimited if the wait would exceed max_wait seconds"""
+        bucket = self.bucket(api_key, model)
+        async with bucket.lock:
+            wait = bucket.wait_time()
+            while wait > 0:
+                if wait > max_wait:
+                    raise ProviderRateLimited(wait)
+                await asyncio.sleep(wait)
+                wait = bucket.wait_time()
+            bucket.take()
+
+    def record_success(self, api_key: str, model: str):
+        self.bucket(api_key, model).reward()
+
+    def record_rate_limited(self, api_key: str, model: str, retry_after: float):
+        logger.warning(f"Rate limited by {model}; backing off for {retry_after:.0f}s")
+        self.bucket(api_key, model).penalize(retry_after)
+
+provider_limiter = ProviderRateLimiter()
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Retry-After header in seconds, falling back to RATE_LIMIT_DEFAULT_RETRY_AFTER"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return RATE_LIMIT_DEFAULT_RETRY_AFTER
+
+# Whole status tokens only, so ids and other numbers that contain "429" don't match
+RATE_LIMIT_ERROR_RE = re.compile(r"\b429\b|\bRESOURCE_EXHAUSTED\b")
+
+def rate_limit_retry_after(error: Exception) -> Optional[float]:
+    """Seconds to back off if error is a provider 429, otherwise None"""
+    if isinstance(error, ProviderRateLimited):
+        return error.retry_after
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return RATE_LIMIT_DEFAULT_RETRY_AFTER
+    # google-genai APIError carries the RPC status name
+    if getattr(error, "status", None) == "RESOURCE_EXHAUSTED":
+        return RATE_LIMIT_DEFAULT_RETRY_AFTER
+    # SDKs that only surface the provider error as text
+    if RATE_LIMIT_ERROR_RE.search(str(error)):
+        return RATE_LIMIT_DEFAULT_RETRY_AFTER
+    return None
+
+# ==================== PROVIDER RESILIENCE ====================
+#
+# All Gemini, Veo and OAuth calls go through call_provider(). Failures are
+# classified: rate limits wait behind the token bucket, transient errors
+# (timeouts, connection drops, 5xx) are retried with full-jitter exponential
+# backoff, and anything else fails at once. Repeated transient failures open
+# the provider's circuit so calls fail fast with CircuitOpen until a
+# half-open probe succeeds.
+
+class ProviderUnavailable(HTTPException):
+    """Transient upstream failure (timeout, connection error, 5xx)"""
+
+    def __init__(self, detail: str = "AI provider temporarily unavailable"):
+        super().__init__(status_code=503, detail=detail)
+
+class CircuitOpen(ProviderBackoff):
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(503, f"{provider} is unavailable, please retry shortly", retry_after)
+
+TRANSIENT_ERROR_RE = re.compile(r"\b(?:UNAVAILABLE|DEADLINE_EXCEEDED|INTERNAL|50[234]|(?i:overloaded))\b")
+TRANSIENT_ERROR_STATUSES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL"}
+
+def classify_provider_error(error: Exception) -> str:
+    """One of "rate_limited", "transient" or "permanent" """
+    if isinstance(error, CircuitOpen):
+        return "permanent"
+    if rate_limit_retry_after(error) is not None:
+        return "rate_limited"
+    if isinstance(error, (ProviderUnavailable, httpx.TransportError, asyncio.TimeoutError, ConnectionError)):
+        return "transient"
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return "transient" if status >= 500 and not isinstance(error, HTTPException) else "permanent"
+    if getattr(error, "status", None) in TRANSIENT_ERROR_STATUSES:
+        return "transient"
+    if TRANSIENT_ERROR_RE.search(str(error)):
+        return "transient"
+    return "permanent"
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given 1-based retry"""
+    return random.uniform(0, min(PROVIDER_RETRY_MAX_DELAY, PROVIDER_RETRY_BASE_DELAY * (2 ** (attempt - 1))))
+
+class CircuitBreaker:
+    """Closed -> open after CIRCUIT_FAILURE_THRESHOLD consecutive transient failures;
+    open -> half-open after CIRCUIT_RESET_SECONDS, when a single probe decides
+    whether it closes again or re-opens."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.metrics = {"calls": 0, "successes": 0, "retries": 0, "rejected": 0, "trips": 0,
+                        "errors": {"rate_limited": 0, "transient": 0, "permanent": 0}}
+        self.last_trip_at: Optional[str] = None
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpen unless a call may go ahead; True if the call is the half-open probe.
+
+        The caller must clear probe_in_flight when a probe ends, however it ends.
+        """
+        if self.state == "open":
+            remaining = self.opened_at + CIRCUIT_RESET_SECONDS - time.monotonic()
+            if remaining > 0:
+                self.metrics["rejected"] += 1
+                raise CircuitOpen(self.name, remaining)
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self.probe_in_flight:
+                self.metrics["rejected"] += 1
+                raise CircuitOpen(self.name, CIRCUIT_RESET_SECONDS)
+            self.probe_in_flight = True
+        self.metrics["calls"] += 1
+        return self.state == "half_open"
+
+    def record_success(self):
+        self.metrics["successes"] += 1
+        self.failures = 0
+        self.probe_in_flight = False
+        if self.state != "closed":
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = "closed"
+
+    def record_failure(self, kind: str):
+        self.metrics["errors"][kind] += 1
+        self.probe_in_flight = False
+        if kind != "transient":
+            # Rate limits and bad requests say nothing about provider health
+            if self.state == "half_open":
+                self.state = "closed"
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.trip()
+
+    def trip(self):
+        if self.state != "open":
+            self.metrics["trips"] += 1
+            self.last_trip_at = datetime.now(timezone.utc).isoformat()
+            logger.warning(f"Circuit for {self.name} opened after {self.failures} transient failures")
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "last_trip_at": self.last_trip_at,
+            **self.metrics
+        }
+
+circuit_breakers: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(name) for name in ("gemini", "veo", "oauth")
+}
+
+async def call_provider(provider: str, call: Callable[[], Awaitable[Any]],
+                        api_key: Optional[str] = None, model: Optional[str] = None,
+                        retry_transient: bool = True,
+                        max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS) -> Any:
+    """Run a provider call with rate limiting (when keyed), retries and the provider's circuit breaker.
+
+    Pass retry_transient=False for calls that are not idempotent: a timeout
+    may come after the provider accepted the request, so only rate limits
+    (which are refused before any work starts) are retried.
+    Request-path callers pass max_wait=RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS
+    so a rate limit becomes a 429 with Retry-After rather than a long hang.
+    """
+    breaker = circuit_breakers[provider]
+    rate_limited = transient = 0
+    while True:
+        probe = breaker.before_call()
+        try:
+            if api_key and model:
+                await provider_limiter.acquire(api_key, model, max_wait)
+            try:
+                result = await call()
+            except Exception as e:
+                kind = classify_provider_error(e)
+                breaker.record_failure(kind)
+                if kind == "rate_limited":
+                    retry_after = rate_limit_retry_after(e)
+                    if api_key and model:
+                        provider_limiter.record_rate_limited(api_key, model, retry_after)
+                    rate_limited += 1
+                    if rate_limited > RATE_LIMIT_MAX_RETRIES or retry_after > max_wait:
+                        raise ProviderRateLimited(retry_after)
+                    if not (api_key and model):
+                        await asyncio.sleep(retry_after)
+                elif kind == "transient":
+                    transient += 1
+                    if not retry_transient or transient > PROVIDER_RETRY_ATTEMPTS or breaker.state == "open":
+                        raise e if isinstance(e, HTTPException) else ProviderUnavailable()
+                    delay = backoff_delay(transient)
+                    logger.warning(f"{provider} call failed ({e}); retry {transient} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                else:
+                    raise
+                breaker.metrics["retries"] += 1
+                continue
+            breaker.record_success()
+        finally:
+            # A probe that was cancelled or never sent must not hold the half-open slot
+            if probe:
+                breaker.probe_in_flight = False
+        if api_key and model:
+            provider_limiter.record_success(api_key, model)
+        return result
+
+# ==================== BLOB STORE ====================
+
+class BlobStore:
+    """Content-addressed storage for generated media on the local filesystem.
+
+    Bytes are written once under their SHA-256 digest, so an identical image
+    produced for any scene or project is stored a single time. Size and MIME
+    type are recorded in the `blobs` collection.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    async def put(self, data: bytes, mime_type: str) -> str:
+        """Store bytes and return their digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.exists(digest):
+            await asyncio.to_thread(self._write, self.path(digest), data)
+        await db.blobs.update_one(
+            {"digest": digest},
+            {"$setOnInsert": {
+                "digest": digest,
+                "size": len(data),
+                "mime_type": mime_type,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+        return digest
+
+    async def get(self, digest: str) -> bytes:
+        return await asyncio.to_thread(self.path(digest).read_bytes)
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so readers never see a partial blob
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+blob_store = BlobStore(BLOBS_DIR)
+
+def scene_image_url(project_id: str, scene_id: str, digest: str) -> str:
+    return f"/api/projects/{project_id}/scenes/{scene_id}/image?v={digest[:16]}"
+
+def parse_byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into inclusive (start, end); None if unsupported"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(end_str), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+async def blob_response(request: Request, digest: str, mime_type: str, cache_control: str) -> Response:
+    """Serve a blob with a strong ETag, conditional 304s and single byte-range support"""
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    path = blob_store.path(digest)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Image not found")
+    size = path.stat().st_size
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = parse_byte_range(range_header, size)
+        if byte_range:
+            start, end = byte_range
+            data = (await blob_store.get(digest))[start:end + 1]
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            return Response(content=data, status_code=206, media_type=mime_type, headers=headers)
+
+    return FileResponse(str(path), media_type=mime_type, headers=headers)
+
+async def migrate_inline_scene_images(batch_size: int = 20):
+    """Move legacy `image_full_data` payloads off scene documents into the blob store"""
+    migrated = 0
+    while True:
+        scenes = await db.scenes.find(
+            {"image_full_data": {"$exists": True}},
+            {"_id": 0, "scene_id": 1, "project_id": 1, "image_full_data": 1}
+        ).to_list(batch_size)
+        if not scenes:
+            break
+        for scene in scenes:
+            update: Dict[str, Any] = {"$unset": {"image_full_data": ""}}
+            if scene.get("image_full_data"):
+                digest = await blob_store.put(base64.b64decode(scene["image_full_data"]), "image/png")
+                update["$set"] = {
+                    "image_digest": digest,
+                    "image_mime_type": "image/png",
+                    "image_url": scene_image_url(scene["project_id"], scene["scene_id"], digest),
+                    "image_base64": None
+                }
+            await db.scenes.update_one({"scene_id": scene["scene_id"]}, update)
+            migrated += 1
+    if migrated:
+        logger.info(f"Moved {migrated} inline scene images to the blob store")
+
+# ==================== INDEXES ====================
+
+# Every index the application relies on, by collection. Names are fixed so the
+# report CLI (`python -m indexes report`) can match them against the database.
+INDEX_SPECS: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email"),
+    ],
+    "user_sessions": [
+        IndexModel([("session_token", ASCENDING)], name="session_token_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Only expires documents whose expires_at is a BSON date (see migrate_session_expiry_dates)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "projects": [
+        IndexModel([("project_id", ASCENDING)], name="project_id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+    ],
+    "scenes": [
+        IndexModel([("scene_id", ASCENDING)], name="scene_id_unique", unique=True),
+        IndexModel([("project_id", ASCENDING), ("scene_number", ASCENDING)], name="project_id_scene_number"),
+        IndexModel([("project_id", ASCENDING), ("segment_key", ASCENDING)], name="project_id_segment_key"),
+    ],
+    "characters": [
+        IndexModel([("character_id", ASCENDING)], name="character_id_unique", unique=True),
+        IndexModel([("project_id", ASCENDING), ("name", ASCENDING)], name="project_id_name"),
+    ],
+    "jobs": [
+        IndexModel([("job_id", ASCENDING)], name="job_id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("run_after", ASCENDING)], name="status_run_after"),
+        IndexModel([("project_id", ASCENDING), ("created_at", DESCENDING)], name="project_id_created_at"),
+        # finished_at is only set once a job completes or fails, so queued and running jobs never expire
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl",
+                   expireAfterSeconds=JOB_RETENTION_SECONDS, sparse=True),
+    ],
+    "blobs": [
+        IndexModel([("digest", ASCENDING)], name="digest_unique", unique=True),
+    ],
+    "decomposition_cache": [
+        IndexModel([("cache_key", ASCENDING)], name="cache_key_unique", unique=True),
+        IndexModel([("last_used_at", ASCENDING)], name="last_used_at"),
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=DECOMPOSE_CACHE_TTL_SECONDS),
+    ],
+    "idempotency_keys": [
+        IndexModel([("scope", ASCENDING)], name="scope_unique", unique=True),
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS),
+    ],
+    "image_generation_cache": [
+        IndexModel([("cache_key", ASCENDING)], name="cache_key_unique", unique=True),
+        IndexModel([("last_used_at", ASCENDING)], name="last_used_at"),
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=IMAGE_GEN_CACHE_TTL_SECONDS),
+    ],
+}
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """Create any missing indexes; existing ones are left untouched. Returns failures by collection."""
+    failures: Dict[str, List[str]] = {}
+    for collection, indexes in INDEX_SPECS.items():
+        for index in indexes:
+            # One at a time so a single conflict (e.g. duplicate legacy ids) doesn't block the rest
+            try:
+                await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                name = index.document["name"]
+                logger.error(f"Failed to create index {collection}.{name}: {e}")
+                failures.setdefault(collection, []).append(name)
+    return failures
+
+# Indexes replaced by INDEX_SPECS entries; dropped at startup if an older deploy created them
+LEGACY_INDEXES: Dict[str, List[str]] = {
+    # Partial TTL on updated_at; its $in filter needs MongoDB 6.0+
+    "jobs": ["finished_ttl"],
+}
+
+async def drop_legacy_indexes():
+    """Drop indexes an earlier INDEX_SPECS created under a name that is no longer used"""
+    for collection, names in LEGACY_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info(f"Dropped legacy index {collection}.{name}")
+
+async def migrate_session_expiry_dates(batch_size: int = 500):
+    """Convert legacy ISO-string `expires_at` values to dates so the TTL index applies to them"""
+    migrated = 0
+    while True:
+        sessions = await db.user_sessions.find(
+            {"expires_at": {"$type": "string"}},
+            {"_id": 1, "expires_at": 1}
+        ).to_list(batch_size)
+        if not sessions:
+            break
+        for session in sessions:
+            expires_at = datetime.fromisoformat(session["expires_at"])
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            await db.user_sessions.update_one({"_id": session["_id"]}, {"$set": {"expires_at": expires_at}})
+            migrated += 1
+    if migrated:
+        logger.info(f"Converted expires_at to a date on {migrated} sessions")
+
+async def migrate_job_finished_at():
+    """Backfill finished_at on jobs that finished before it was recorded, so the TTL index applies to them"""
+    result = await db.jobs.update_many(
+        {"status": {"$in": ["completed", "failed"]}, "finished_at": {"$exists": False}},
+        [{"$set": {"finished_at": "$updated_at"}}]
+    )
+    if result.modified_count:
+        logger.info(f"Set finished_at on {result.modified_count} finished jobs")
+
+async def run_migrations():
+    """Idempotent schema bootstrap run at startup and by `python -m indexes ensure`"""
+    await drop_legacy_indexes()
+    await ensure_indexes()
+    await migrate_session_expiry_dates()
+    await migrate_inline_scene_images()
+    await migrate_job_finished_at()
+
 # ==================== MODELS ====================
 
 class User(BaseModel):
@@ -65,6 +760,8 @@ class Project(BaseModel):
     title: str
     script: str = ""
     status: str = "draft"  # draft, scenes_generated, images_generated, videos_generated, completed
+    final_stream: Optional[Dict[str, Any]] = None  # HLS/DASH renditions of final.mp4 (see package_stream)
+    empty_segment_keys: List[str] = []  # Script segments that were decomposed but produced no scenes
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -79,10 +776,16 @@ class Scene(BaseModel):
     action_summary: str = ""
     image_url: Optional[str] = None
     image_base64: Optional[str] = None
+    image_digest: Optional[str] = None  # SHA-256 of the image in the blob store
+    image_mime_type: Optional[str] = None
     image_approved: bool = False  # User approval for image
     video_url: Optional[str] = None
-    video_status: str = "pending"  # pending, generating, completed, failed
+    video_status: str = "pending"  # pending, queued, generating, completed, failed
+    video_digest: Optional[str] = None  # SHA-256 of the clip on disk
+    video_meta: Optional[Dict[str, Any]] = None  # ffprobe summary of the clip (see probe_clip)
+    video_stream: Optional[Dict[str, Any]] = None  # HLS/DASH renditions (see package_stream)
     video_approved: bool = False  # User approval for video
+    segment_key: Optional[str] = None  # Script segment this scene was decomposed from
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class Character(BaseModel):
@@ -96,6 +799,28 @@ class Character(BaseModel):
     style: str = ""
     reference_prompt: str = ""
 
+class Job(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    job_id: str = Field(default_factory=lambda: f"job_{uuid.uuid4().hex[:12]}")
+    type: str  # generate_image, generate_video, generate_all_images, generate_all_videos
+    user_id: str
+    project_id: str
+    scene_id: Optional[str] = None
+    payload: Dict[str, Any] = {}
+    status: str = "queued"  # queued, running, completed, failed
+    attempts: int = 0
+    max_attempts: int = JOB_MAX_ATTEMPTS
+    progress: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    worker_id: Optional[str] = None
+    run_after: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    lease_expires_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # finished_at is written by _finish_job on terminal states only; it is left out here so the TTL index stays sparse
+
 # ==================== REQUEST/RESPONSE MODELS ====================
 
 class SessionRequest(BaseModel):
@@ -132,6 +857,114 @@ class SceneRegenerateRequest(BaseModel):
     scene_id: str
     regenerate_type: str  # image or video
 
+# ==================== SESSION CACHE ====================
+
+class SessionCache:
+    """In-process TTL/LRU cache of session token -> (user, session expiry).
+
+    Entries are dropped explicitly on logout and on user settings changes in
+    this process. Changes made by other workers are picked up when the TTL
+    runs out, or immediately when the change-stream listener is enabled.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, set] = {}
+        self._tokens_by_session_id: Dict[Any, str] = {}
+
+    def get(self, session_token: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(session_token)
+        if entry is None:
+            return None
+        if entry["cached_at"] + self.ttl_seconds < time.monotonic():
+            self.invalidate_token(session_token)
+            return None
+        self._entries.move_to_end(session_token)
+        return entry
+
+    def put(self, session_token: str, user: User, expires_at: datetime, session_id: Any = None):
+        self.invalidate_token(session_token)
+        self._entries[session_token] = {
+            "user": user,
+            "expires_at": expires_at,
+            "session_id": session_id,
+            "cached_at": time.monotonic()
+        }
+        self._tokens_by_user.setdefault(user.user_id, set()).add(session_token)
+        if session_id is not None:
+            self._tokens_by_session_id[session_id] = session_token
+        while len(self._entries) > self.max_entries:
+            self.invalidate_token(next(iter(self._entries)))
+
+    def invalidate_token(self, session_token: str):
+        entry = self._entries.pop(session_token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry["user"].user_id)
+        if tokens is not None:
+            tokens.discard(session_token)
+            if not tokens:
+                del self._tokens_by_user[entry["user"].user_id]
+        self._tokens_by_session_id.pop(entry["session_id"], None)
+
+    def invalidate_session_id(self, session_id: Any):
+        session_token = self._tokens_by_session_id.get(session_id)
+        if session_token:
+            self.invalidate_token(session_token)
+
+    def invalidate_user(self, user_id: str):
+        for session_token in list(self._tokens_by_user.get(user_id, ())):
+            self.invalidate_token(session_token)
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+        self._tokens_by_session_id.clear()
+        self._tokens_by_user.clear()
+        self._tokens_by_session_id.clear()
+
+session_cache = SessionCache(SESSION_CACHE_TTL_SECONDS, SESSION_CACHE_MAX_ENTRIES)
+
+async def watch_session_invalidations():
+    """Invalidate cached sessions on user/session writes from any worker (change stream)"""
+    pipeline = [{"$match": {
+        "ns.coll": {"$in": ["users", "user_sessions"]},
+        "operationType": {"$in": ["insert", "update", "replace", "delete"]}
+    }}]
+    while True:
+        try:
+            async with db.watch(pipeline, full_document="updateLookup") as stream:
+                logger.info("Session cache change-stream listener started")
+                async for change in stream:
+                    collection = change["ns"]["coll"]
+                    document = change.get("fullDocument") or {}
+                    if collection == "user_sessions":
+                        if document.get("session_token"):
+                            session_cache.invalidate_token(document["session_token"])
+                        else:
+                            session_cache.invalidate_session_id(change["documentKey"]["_id"])
+                    elif document.get("user_id"):
+                        session_cache.invalidate_user(document["user_id"])
+                    else:
+                        # Deleted user: the event no longer says which one
+                        session_cache.clear()
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code == 40573:
+                logger.warning("Change streams need a replica set; session cache relies on its TTL")
+                return
+            session_cache.clear()
+            logger.error(f"Session cache change stream error: {e}; retrying in 10s")
+            await asyncio.sleep(10)
+        except Exception as e:
+            # Anything missed while disconnected may be stale, so start over
+            session_cache.clear()
+            logger.error(f"Session cache change stream error: {e}; retrying in 10s")
+            await asyncio.sleep(10)
+
 # ==================== AUTH HELPERS ====================
 
 async def get_current_user(request: Request) -> User:
@@ -145,9 +978,15 @@ async def get_current_user(request: Request) -> User:
     if not session_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
+    cached = session_cache.get(session_token)
+    if cached:
+        if cached["expires_at"] < datetime.now(timezone.utc):
+            session_cache.invalidate_token(session_token)
+            raise HTTPException(status_code=401, detail="Session expired")
+        return cached["user"].model_copy()
+    
     session_doc = await db.user_sessions.find_one(
-        {"session_token": session_token},
-        {"_id": 0}
+        {"session_token": session_token}
     )
     
     if not session_doc:
@@ -169,27 +1008,33 @@ async def get_current_user(request: Request) -> User:
     if not user_doc:
         raise HTTPException(status_code=401, detail="User not found")
     
-    return User(**user_doc)
+    user = User(**user_doc)
+    session_cache.put(session_token, user, expires_at, session_doc["_id"])
+    return user.model_copy()
 
 # ==================== AUTH ROUTES ====================
 
 @api_router.post("/auth/session")
 async def create_session(request: SessionRequest, response: Response):
     """Exchange session_id for session data and create persistent session"""
-    try:
-        async with httpx.AsyncClient() as http_client:
-            resp = await http_client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
+    async def fetch_session_data() -> Dict[str, Any]:
+        try:
+            resp = await http_pool.request(
+                "GET",
+                AUTH_SESSION_URL,
                 headers={"X-Session-ID": request.session_id}
             )
-            
-            if resp.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid session ID")
-            
-            data = resp.json()
-    except httpx.RequestError as e:
-        logger.error(f"Auth service error: {e}")
-        raise HTTPException(status_code=500, detail="Authentication service unavailable")
+        except httpx.RequestError as e:
+            logger.error(f"Auth service error: {e}")
+            raise ProviderUnavailable("Authentication service unavailable")
+        
+        if resp.status_code >= 500:
+            raise ProviderUnavailable("Authentication service unavailable")
+        if resp.status_code != 200:
+            raise HTTPException(status_code=401, detail="Invalid session ID")
+        return resp.json()
+    
+    data = await call_provider("oauth", fetch_session_data, max_wait=RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS)
     
     user_id = f"user_{uuid.uuid4().hex[:12]}"
     existing_user = await db.users.find_one({"email": data["email"]}, {"_id": 0})
@@ -204,6 +1049,7 @@ async def create_session(request: SessionRequest, response: Response):
                 "updated_at": datetime.now(timezone.utc).isoformat()
             }}
         )
+        session_cache.invalidate_user(user_id)
     else:
         user_doc = {
             "user_id": user_id,
@@ -222,7 +1068,7 @@ async def create_session(request: SessionRequest, response: Response):
     session_doc = {
         "user_id": user_id,
         "session_token": session_token,
-        "expires_at": expires_at.isoformat(),
+        "expires_at": expires_at,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.user_sessions.insert_one(session_doc)
@@ -251,12 +1097,24 @@ async def logout(request: Request, response: Response):
     session_token = request.cookies.get("session_token")
     if session_token:
         await db.user_sessions.delete_one({"session_token": session_token})
+        session_cache.invalidate_token(session_token)
     
     response.delete_cookie(key="session_token", path="/")
     return {"message": "Logged out successfully"}
 
 # ==================== API KEY ROUTES ====================
 
+# Rate limiter bucket for the models listing used to validate keys
+GEMINI_LIST_MODELS = "models.list"
+
+async def _list_gemini_models(api_key: str) -> httpx.Response:
+    resp = await http_pool.request("GET", f"{GEMINI_API_BASE}/models?key={api_key}", timeout=10.0)
+    if resp.status_code == 429:
+        raise ProviderRateLimited(parse_retry_after(resp.headers.get("Retry-After")))
+    if resp.status_code >= 500:
+        raise ProviderUnavailable()
+    return resp
+
 @api_router.post("/settings/api-key")
 async def set_api_key(request: ApiKeyRequest, user: User = Depends(get_current_user)):
     """Save and validate Gemini API key"""
@@ -265,13 +1123,11 @@ async def set_api_key(request: ApiKeyRequest, user: User = Depends(get_current_u
     # Validate the API key by making a test request
     try:
         # Simple validation - try to list models
-        async with httpx.AsyncClient() as http_client:
-            resp = await http_client.get(
-                f"https://generativelanguage.googleapis.com/v1/models?key={api_key}",
-                timeout=10.0
-            )
-            if resp.status_code != 200:
-                raise HTTPException(status_code=400, detail="Invalid API key")
+        resp = await call_provider("gemini", lambda: _list_gemini_models(api_key),
+                                   api_key=api_key, model=GEMINI_LIST_MODELS,
+                                   max_wait=RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS)
+        if resp.status_code != 200:
+            raise HTTPException(status_code=400, detail="Invalid API key")
     except httpx.RequestError as e:
         logger.error(f"API key validation error: {e}")
         raise HTTPException(status_code=400, detail="Failed to validate API key")
@@ -280,6 +1136,7 @@ async def set_api_key(request: ApiKeyRequest, user: User = Depends(get_current_u
         {"user_id": user.user_id},
         {"$set": {"gemini_api_key": api_key, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    session_cache.invalidate_user(user.user_id)
     
     return {"message": "API key saved successfully", "valid": True}
 
@@ -302,6 +1159,7 @@ async def delete_api_key(user: User = Depends(get_current_user)):
             "updated_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    session_cache.invalidate_user(user.user_id)
     return {"message": "API key deleted successfully"}
 
 @api_router.post("/settings/model")
@@ -311,6 +1169,7 @@ async def set_model(request: ModelSelectRequest, user: User = Depends(get_curren
         {"user_id": user.user_id},
         {"$set": {"selected_model": request.model, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
+    session_cache.invalidate_user(user.user_id)
     return {"message": "Model selected successfully"}
 
 @api_router.get("/settings/models")
@@ -411,31 +1270,66 @@ async def delete_project(project_id: str, user: User = Depends(get_current_user)
     
     return {"message": "Project deleted successfully"}
 
+# ==================== SCENE PERSISTENCE ====================
+
+_transactions_supported: Optional[bool] = None
+
+async def run_in_transaction(write: Callable[[Any], Awaitable[None]]):
+    """Run write(session) in a transaction, or without one on a standalone mongod.
+
+    with_transaction re-runs write on TransientTransactionError and retries the
+    commit on UnknownTransactionCommitResult, so write must be safe to repeat.
+    """
+    global _transactions_supported
+    if _transactions_supported is not False:
+        try:
+            async with await client.start_session() as session:
+                await session.with_transaction(write)
+            _transactions_supported = True
+            return
+        except OperationFailure as e:
+            # IllegalOperation: transactions need a replica set or mongos
+            if e.code != 20:
+                raise
+            logger.warning("MongoDB transactions unavailable; writing without one")
+            _transactions_supported = False
+    await write(None)
+
+def build_character_doc(project_id: str, char: Dict[str, Any], now: str) -> Dict[str, Any]:
+    return {
+        "character_id": f"char_{uuid.uuid4().hex[:12]}",
+        "project_id": project_id,
+        "name": char["name"],
+        "appearance": char.get("appearance", ""),
+        "clothing": char.get("clothing", ""),
+        "age": char.get("age", ""),
+        "style": char.get("style", ""),
+        "reference_prompt": f"{char.get('appearance', '')} {char.get('clothing', '')} {char.get('style', '')}",
+        "created_at": now
+    }
+
+def build_scene_doc(project_id: str, scene: Dict[str, Any], now: str) -> Dict[str, Any]:
+    return {
+        "scene_id": f"scene_{uuid.uuid4().hex[:12]}",
+        "project_id": project_id,
+        "scene_number": scene["scene_number"],
+        "description": scene["description"],
+        "characters": scene.get("characters", []),
+        "setting": scene.get("setting", ""),
+        "action_summary": scene.get("action_summary", ""),
+        "image_url": None,
+        "image_base64": None,
+        "video_url": None,
+        "video_status": "pending",
+        "created_at": now
+    }
+
 # ==================== SCENE DECOMPOSITION ====================
 
-@api_router.post("/projects/{project_id}/decompose")
-async def decompose_script(project_id: str, user: User = Depends(get_current_user)):
-    """Use Gemini to decompose script into scenes"""
-    if not user.gemini_api_key:
-        raise HTTPException(status_code=400, detail="API key not set")
-    
-    project = await db.projects.find_one(
-        {"project_id": project_id, "user_id": user.user_id},
-        {"_id": 0}
-    )
-    
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    if not project.get("script"):
-        raise HTTPException(status_code=400, detail="No script provided")
-    
-    # Delete existing scenes
-    await db.scenes.delete_many({"project_id": project_id})
-    await db.characters.delete_many({"project_id": project_id})
-    
-    # Use Gemini to decompose
-    prompt = f"""Analyze the following script and break it down into logical scenes. 
+def build_decompose_prompt(script: str) -> str:
+    return f"""Analyze the following script and break it down into logical scenes. 
+The script is divided into blocks that each start with a "[SEGMENT n]" line.
+A scene never spans two blocks; give each scene the number of its block as "segment".
 For each scene, provide:
 1. A detailed visual description for image generation
 2. List of characters appearing in the scene
@@ -454,6 +1348,7 @@ Return as JSON in this exact format:
     "scenes": [
         {{
             "scene_number": 1,
+            "segment": 1,
             "description": "detailed visual description for image generation",
             "characters": ["character names"],
             "setting": "location description",
@@ -472,99 +1367,630 @@ Return as JSON in this exact format:
 }}
 
 Script:
-{project['script']}
+{script}
 """
 
+async def call_gemini_decompose(api_key: str, prompt: str) -> Dict[str, Any]:
+    """Send a decomposition prompt to Gemini and parse the JSON it returns"""
+    return await call_provider("gemini", lambda: _call_gemini_decompose(api_key, prompt),
+                               api_key=api_key, model=DECOMPOSE_MODEL,
+                               max_wait=RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS)
+
+async def _call_gemini_decompose(api_key: str, prompt: str) -> Dict[str, Any]:
     try:
-        async with httpx.AsyncClient() as http_client:
-            resp = await http_client.post(
-                f"https://generativelanguage.googleapis.com/v1/models/gemini-2.0-flash:generateContent?key={user.gemini_api_key}",
-                json={
-                    "contents": [{"parts": [{"text": prompt}]}],
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "topP": 0.95,
-                        "topK": 40
-                    }
-                },
-                timeout=60.0
-            )
-            
-            if resp.status_code != 200:
-                logger.error(f"Gemini API error: {resp.text}")
-                raise HTTPException(status_code=500, detail="Failed to decompose script")
-            
-            data = resp.json()
-            response_text = data["candidates"][0]["content"]["parts"][0]["text"]
-            
-            # Extract JSON from response
-            json_start = response_text.find("{")
-            json_end = response_text.rfind("}") + 1
-            if json_start == -1 or json_end == 0:
-                raise HTTPException(status_code=500, detail="Invalid response from Gemini")
-            
-            result = json.loads(response_text[json_start:json_end])
-            
+        resp = await http_pool.request(
+            "POST",
+            f"{GEMINI_API_BASE}/models/{DECOMPOSE_MODEL}:generateContent?key={api_key}",
+            json={
+                "contents": [{"parts": [{"text": prompt}]}],
+                "generationConfig": {
+                    "temperature": 0.7,
+                    "topP": 0.95,
+                    "topK": 40
+                }
+            },
+            timeout=60.0
+        )
+        
+        if resp.status_code == 429:
+            raise ProviderRateLimited(parse_retry_after(resp.headers.get("Retry-After")))
+        if resp.status_code >= 500:
+            logger.error(f"Gemini API error: {resp.text}")
+            raise ProviderUnavailable()
+        if resp.status_code != 200:
+            logger.error(f"Gemini API error: {resp.text}")
+            raise HTTPException(status_code=500, detail="Failed to decompose script")
+        
+        data = resp.json()
+        response_text = data["candidates"][0]["content"]["parts"][0]["text"]
+        
+        # Extract JSON from response
+        json_start = response_text.find("{")
+        json_end = response_text.rfind("}") + 1
+        if json_start == -1 or json_end == 0:
+            raise HTTPException(status_code=500, detail="Invalid response from Gemini")
+        
+        return json.loads(response_text[json_start:json_end])
+        
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error: {e}")
         raise HTTPException(status_code=500, detail="Failed to parse scene decomposition")
     except httpx.RequestError as e:
         logger.error(f"Gemini API error: {e}")
-        raise HTTPException(status_code=500, detail="Failed to connect to Gemini API")
+        raise ProviderUnavailable("Failed to connect to Gemini API")
+
+def decomposition_cache_key(script: str) -> str:
+    key_source = f"{DECOMPOSE_PROMPT_VERSION}\n{DECOMPOSE_MODEL}\n{script}"
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+async def _evict_decomposition_cache():
+    """Drop least recently used entries beyond DECOMPOSE_CACHE_MAX_ENTRIES"""
+    excess = await db.decomposition_cache.estimated_document_count() - DECOMPOSE_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    stale = await db.decomposition_cache.find({}, {"_id": 1}).sort("last_used_at", 1).to_list(excess)
+    await db.decomposition_cache.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+async def decompose_text(api_key: str, script: str, use_cache: bool = True) -> Dict[str, Any]:
+    """Decompose script text into scenes and characters, reusing a cached result for identical input"""
+    cache_key = decomposition_cache_key(script)
+    now = datetime.now(timezone.utc)
+    if use_cache:
+        cached = await db.decomposition_cache.find_one_and_update(
+            {"cache_key": cache_key},
+            {"$set": {"last_used_at": now}, "$inc": {"hits": 1}},
+            projection={"_id": 0, "result": 1}
+        )
+        if cached:
+            logger.info(f"Decomposition cache hit {cache_key[:12]}")
+            return cached["result"]
+    
+    result = await call_gemini_decompose(api_key, build_decompose_prompt(script))
+    if not result.get("scenes"):
+        raise HTTPException(status_code=500, detail="Gemini returned no scenes")
+    await store_decomposition(cache_key, result)
+    return result
+
+async def store_decomposition(cache_key: str, result: Dict[str, Any]):
+    """Cache a decomposition result under its content key"""
+    now = datetime.now(timezone.utc)
+    await db.decomposition_cache.update_one(
+        {"cache_key": cache_key},
+        {
+            "$set": {"result": result, "last_used_at": now},
+            "$setOnInsert": {
+                "cache_key": cache_key,
+                "model": DECOMPOSE_MODEL,
+                "prompt_version": DECOMPOSE_PROMPT_VERSION,
+                "created_at": now,
+                "hits": 0
+            }
+        },
+        upsert=True
+    )
+    await _evict_decomposition_cache()
+
+# A line opening a screenplay scene: INT./EXT. sluglines or "SCENE 3"
+SCENE_HEADING_RE = re.compile(r"^[ \t]*(?:INT\.|EXT\.|INT/EXT\.|I/E\.|EST\.|SCENE\s+\d+)", re.IGNORECASE | re.MULTILINE)
+
+def split_script_segments(script: str) -> List[str]:
+    """Split a script into segments that stay stable when other parts are edited.
+
+    Scripts with scene headings split at each heading. Otherwise paragraphs
+    are grouped, ending a segment at a paragraph whose hash picks it once the
+    segment has SEGMENT_MIN_CHARS. Boundaries depend on paragraph content
+    rather than absolute position, so an edit only shifts the boundaries
+    next to it.
+    """
+    script = script.replace("\r\n", "\n")
+    starts = [m.start() for m in SCENE_HEADING_RE.finditer(script)]
+    if len(starts) >= 2:
+        bounds = sorted({0, *starts, len(script)})
+        pieces = [script[a:b].strip() for a, b in zip(bounds, bounds[1:])]
+        return [piece for piece in pieces if piece]
+    
+    segments: List[str] = []
+    current: List[str] = []
+    size = 0
+    for paragraph in (p.strip() for p in re.split(r"\n\s*\n", script)):
+        if not paragraph:
+            continue
+        current.append(paragraph)
+        size += len(paragraph)
+        content_boundary = int(hashlib.sha256(paragraph.encode("utf-8")).hexdigest()[:8], 16) % 4 == 0
+        if size >= SEGMENT_MAX_CHARS or (size >= SEGMENT_MIN_CHARS and content_boundary):
+            segments.append("\n\n".join(current))
+            current, size = [], 0
+    if current:
+        segments.append("\n\n".join(current))
+    return segments
+
+def segment_keys(segments: List[str]) -> List[str]:
+    """Whitespace-insensitive fingerprint per segment, suffixed with its occurrence so repeats stay distinct"""
+    seen: Dict[str, int] = {}
+    keys = []
+    for segment in segments:
+        fingerprint = hashlib.sha256(" ".join(segment.split()).encode("utf-8")).hexdigest()[:32]
+        seen[fingerprint] = seen.get(fingerprint, 0) + 1
+        keys.append(f"{fingerprint}:{seen[fingerprint]}")
+    return keys
+
+def pack_segments(segments: List[str], max_chars: int) -> List[List[int]]:
+    """Greedily group consecutive segment indices into chunks of at most max_chars (a longer segment stands alone)"""
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    size = 0
+    for index, segment in enumerate(segments):
+        if current and size + len(segment) > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(index)
+        size += len(segment)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def segmented_text(segments: List[str]) -> str:
+    """Script text for one decomposition request, each segment under a numbered [SEGMENT n] line"""
+    return "\n\n".join(f"[SEGMENT {number}]\n{segment}" for number, segment in enumerate(segments, 1))
+
+@api_router.post("/projects/{project_id}/decompose")
+async def decompose_script(project_id: str, force: bool = False, mode: str = "full",
+                           user: User = Depends(get_current_user)):
+    """Use Gemini to decompose script into scenes.
+
+    mode=incremental only reprocesses changed script segments and keeps the
+    scenes (and their assets) of unchanged ones; force=true bypasses the
+    result cache.
+    """
+    project = await get_decomposable_project(project_id, mode, user)
+    async for event in decompose_project(project_id, project["script"], user.gemini_api_key,
+                                         use_cache=not force, mode=mode, stream=False):
+        if event["type"] == "done":
+            return {"scenes": event["scenes"], "characters": event["characters"], "segments": event["segments"]}
+
+async def get_decomposable_project(project_id: str, mode: str, user: User) -> Dict[str, Any]:
+    """Check a decomposition request and return its project"""
+    if mode not in ("full", "incremental"):
+        raise HTTPException(status_code=400, detail="mode must be 'full' or 'incremental'")
     
-    # Save characters
-    now = datetime.now(timezone.utc).isoformat()
-    for char in result.get("characters", []):
-        char_doc = {
-            "character_id": f"char_{uuid.uuid4().hex[:12]}",
-            "project_id": project_id,
-            "name": char["name"],
-            "appearance": char.get("appearance", ""),
-            "clothing": char.get("clothing", ""),
-            "age": char.get("age", ""),
-            "style": char.get("style", ""),
-            "reference_prompt": f"{char.get('appearance', '')} {char.get('clothing', '')} {char.get('style', '')}",
-            "created_at": now
-        }
-        await db.characters.insert_one(char_doc)
-    
-    # Save scenes
-    for scene in result.get("scenes", []):
-        scene_doc = {
-            "scene_id": f"scene_{uuid.uuid4().hex[:12]}",
-            "project_id": project_id,
-            "scene_number": scene["scene_number"],
-            "description": scene["description"],
-            "characters": scene.get("characters", []),
-            "setting": scene.get("setting", ""),
-            "action_summary": scene.get("action_summary", ""),
-            "image_url": None,
-            "image_base64": None,
-            "video_url": None,
-            "video_status": "pending",
-            "created_at": now
-        }
-        await db.scenes.insert_one(scene_doc)
+    if not user.gemini_api_key:
+        raise HTTPException(status_code=400, detail="API key not set")
     
-    # Update project status
-    await db.projects.update_one(
-        {"project_id": project_id},
-        {"$set": {"status": "scenes_generated", "updated_at": now}}
+    project = await db.projects.find_one(
+        {"project_id": project_id, "user_id": user.user_id},
+        {"_id": 0}
     )
     
-    scenes = await db.scenes.find({"project_id": project_id}, {"_id": 0}).sort("scene_number", 1).to_list(100)
-    characters = await db.characters.find({"project_id": project_id}, {"_id": 0}).to_list(100)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if not project.get("script"):
+        raise HTTPException(status_code=400, detail="No script provided")
+    
+    return project
+
+# ==================== STREAMING DECOMPOSITION ====================
+
+class StreamingDecompositionParser:
+    """Incrementally extract scene and character objects from streamed decomposition JSON.
+
+    Text is fed as it arrives; every object that closes inside the top-level
+    "scenes" or "characters" array is yielded immediately. Anything before
+    the first "{" (such as a markdown fence) is ignored, and an element that
+    fails to parse is skipped (and counted) rather than aborting the stream.
+    Once the text ends, complete says whether it was a whole response.
+    """
+
+    ARRAY_KEYS = {"scenes": "scene", "characters": "character"}
+
+    def __init__(self):
+        self.closed = False  # the top-level object closed
+        self.closed_arrays: Set[str] = set()
+        self.skipped = 0
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_key: Optional[str] = None
+        self._array_key: Optional[str] = None
+        self._element_start = -1
+
+    def feed(self, text: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        self._buffer += text
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            i = self._pos
+            ch = buffer[i]
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = buffer[self._string_start + 1:i]
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and self._depth == 1:
+                self._array_key = self._last_key if self._last_key in self.ARRAY_KEYS else None
+            elif ch in "{[":
+                if ch == "{" and self._depth == 2 and self._array_key:
+                    self._element_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._depth == 2 and self._array_key and self._element_start >= 0:
+                    try:
+                        yield self.ARRAY_KEYS[self._array_key], json.loads(buffer[self._element_start:i + 1])
+                    except json.JSONDecodeError as e:
+                        self.skipped += 1
+                        logger.warning(f"Skipping unparseable streamed {self._array_key} element: {e}")
+                    self._element_start = -1
+                elif self._depth == 1:
+                    if ch == "]" and self._array_key:
+                        self.closed_arrays.add(self._array_key)
+                    self._array_key = None
+                elif self._depth == 0 and ch == "}":
+                    self.closed = True
+
+    @property
+    def complete(self) -> bool:
+        """The response closed, including its scenes array, and no element was skipped"""
+        return self.closed and "scenes" in self.closed_arrays and not self.skipped
+
+async def stream_gemini_text(api_key: str, prompt: str) -> AsyncIterator[str]:
+    """Yield response text from Gemini's streamGenerateContent as it is produced"""
+    url = f"{GEMINI_API_BASE}/models/{DECOMPOSE_MODEL}:streamGenerateContent?alt=sse&key={api_key}"
+    # Streamed responses can't be replayed, so this takes the breaker and limiter by hand without retries
+    breaker = circuit_breakers["gemini"]
+    probe = breaker.before_call()
+    try:
+        await provider_limiter.acquire(api_key, DECOMPOSE_MODEL, RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS)
+        async with http_pool.get(url).stream(
+            "POST",
+            url,
+            json={
+                "contents": [{"parts": [{"text": prompt}]}],
+                "generationConfig": {
+                    "temperature": 0.7,
+                    "topP": 0.95,
+                    "topK": 40
+                }
+            },
+            timeout=60.0
+        ) as resp:
+            if resp.status_code == 429:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                breaker.record_failure("rate_limited")
+                provider_limiter.record_rate_limited(api_key, DECOMPOSE_MODEL, retry_after)
+                raise ProviderRateLimited(retry_after)
+            if resp.status_code != 200:
+                logger.error(f"Gemini API error: {(await resp.aread()).decode(errors='replace')}")
+                if resp.status_code >= 500:
+                    breaker.record_failure("transient")
+                    raise ProviderUnavailable()
+                breaker.record_failure("permanent")
+                raise HTTPException(status_code=500, detail="Failed to decompose script")
+            breaker.record_success()
+            provider_limiter.record_success(api_key, DECOMPOSE_MODEL)
+            finish_reason = None
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = json.loads(line[len("data:"):])
+                for candidate in payload.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+                    finish_reason = candidate.get("finishReason") or finish_reason
+            if finish_reason and finish_reason != "STOP":
+                logger.error(f"Gemini stream ended with finishReason {finish_reason}")
+                raise HTTPException(status_code=500, detail="Gemini response was cut off" if finish_reason == "MAX_TOKENS"
+                                    else "Failed to decompose script")
+    except httpx.TransportError as e:
+        breaker.record_failure("transient")
+        logger.error(f"Gemini API error: {e}")
+        raise ProviderUnavailable("Failed to connect to Gemini API")
+    finally:
+        # Also runs when the client disconnects and the stream is closed mid-probe
+        if probe:
+            breaker.probe_in_flight = False
+
+async def stream_chunk_items(api_key: str, text: str, use_cache: bool) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ("scene" | "character", item) pairs for one script chunk, from the cache or as Gemini streams them"""
+    cache_key = decomposition_cache_key(text)
+    cached = await db.decomposition_cache.find_one_and_update(
+        {"cache_key": cache_key},
+        {"$set": {"last_used_at": datetime.now(timezone.utc)}, "$inc": {"hits": 1}},
+        projection={"_id": 0, "result": 1}
+    ) if use_cache else None
+    if cached:
+        for scene in cached["result"].get("scenes", []):
+            yield "scene", scene
+        for char in cached["result"].get("characters", []):
+            yield "character", char
+        return
+    
+    raw = {"scenes": [], "characters": []}
+    parser = StreamingDecompositionParser()
+    async for chunk_text in stream_gemini_text(api_key, build_decompose_prompt(text)):
+        for kind, item in parser.feed(chunk_text):
+            raw["scenes" if kind == "scene" else "characters"].append(item)
+            yield kind, item
+    # A cut-off or partly unparseable response must never reach the cache or replace a breakdown
+    if not parser.complete:
+        logger.error(f"Incomplete streamed decomposition ({parser.skipped} elements skipped)")
+        raise HTTPException(status_code=500, detail="Gemini returned an incomplete scene breakdown")
+    if not raw["scenes"]:
+        raise HTTPException(status_code=500, detail="Gemini returned no scenes")
+    await store_decomposition(cache_key, raw)
+
+async def chunked_decomposition_items(api_key: str, chunks: List[str], use_cache: bool,
+                                      stream: bool = True) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+    """Decompose chunks concurrently (at most DECOMPOSE_CONCURRENCY), yielding (chunk index, kind, item) in script order.
+
+    With stream, each chunk's items arrive as Gemini produces them;
+    otherwise a chunk's items arrive together once its request completes.
+    """
+    semaphore = asyncio.Semaphore(DECOMPOSE_CONCURRENCY)
+    queues: List[asyncio.Queue] = [asyncio.Queue() for _ in chunks]
+    
+    async def produce(queue: asyncio.Queue, text: str):
+        try:
+            async with semaphore:
+                if stream:
+                    async for item in stream_chunk_items(api_key, text, use_cache):
+                        queue.put_nowait(item)
+                else:
+                    result = await decompose_text(api_key, text, use_cache=use_cache)
+                    for scene in result.get("scenes", []):
+                        queue.put_nowait(("scene", scene))
+                    for char in result.get("characters", []):
+                        queue.put_nowait(("character", char))
+        except Exception as e:
+            queue.put_nowait(e)
+        else:
+            queue.put_nowait(None)
+    
+    tasks = [asyncio.create_task(produce(queue, text)) for queue, text in zip(queues, chunks)]
+    try:
+        for index, queue in enumerate(queues):
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield (index, *item)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def scene_segment(scene: Dict[str, Any], chunk: List[int], previous: int) -> int:
+    """Script segment index of a decomposed scene from its 1-based "segment" within the chunk"""
+    try:
+        number = int(scene.get("segment"))
+    except (TypeError, ValueError):
+        number = 0
+    # A scene without a usable segment number belongs with the scene before it
+    return chunk[number - 1] if 1 <= number <= len(chunk) else previous
+
+async def decompose_project(project_id: str, script: str, api_key: str, use_cache: bool = True,
+                            mode: str = "full", stream: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """Decompose a project's script, yielding scene and character events as they are parsed, then "done".
+
+    Every scene is tagged with the segment_key of the script segment it came
+    from. mode=incremental keeps the scenes (with their images, videos and
+    approvals) of unchanged segments and only sends changed segments to
+    Gemini; full re-decomposes them all. Segments are packed into chunks of
+    at most DECOMPOSE_CHUNK_CHARS that are decomposed concurrently, streamed
+    when stream is set; scenes are numbered across chunks and characters
+    merged by name. Nothing is written until every chunk has completed; the
+    new breakdown then replaces the old one in a single transaction, so a
+    failed, truncated or abandoned run leaves the project as it was.
+    """
+    segments = split_script_segments(script)
+    if not segments:
+        raise HTTPException(status_code=400, detail="No script provided")
+    keys = segment_keys(segments)
+    now = datetime.now(timezone.utc).isoformat()
     
-    return {"scenes": scenes, "characters": characters}
+    reused: Dict[int, List[Dict[str, Any]]] = {}
+    existing_ids: List[str] = []
+    characters: Dict[str, Dict[str, Any]] = {}
+    if mode == "incremental":
+        existing = await db.scenes.find(
+            {"project_id": project_id},
+            scene_projection("full")
+        ).sort("scene_number", 1).to_list(None)
+        existing_ids = [scene["scene_id"] for scene in existing]
+        scenes_by_key: Dict[str, List[Dict[str, Any]]] = {}
+        for scene in existing:
+            if scene.get("segment_key"):
+                scenes_by_key.setdefault(scene["segment_key"], []).append(scene)
+        project = await db.projects.find_one({"project_id": project_id}, {"_id": 0, "empty_segment_keys": 1})
+        empty_keys = set((project or {}).get("empty_segment_keys") or [])
+        for index, key in enumerate(keys):
+            if key in scenes_by_key:
+                reused[index] = scenes_by_key[key]
+            elif key in empty_keys:
+                reused[index] = []
+        for char in await db.characters.find({"project_id": project_id}, {"_id": 0}).to_list(None):
+            characters.setdefault(char["name"].strip().lower(), char)
+    existing_names = set(characters)
+    
+    changed = [index for index in range(len(segments)) if index not in reused]
+    chunks = [[changed[i] for i in chunk] for chunk in pack_segments([segments[i] for i in changed], DECOMPOSE_CHUNK_CHARS)]
+    if len(chunks) > 1:
+        logger.info(f"Decomposing {len(changed)} of {len(segments)} segments in {len(chunks)} chunks")
+    fresh: Dict[int, List[Dict[str, Any]]] = {index: [] for index in changed}
+    emitted = {"segments": 0, "scenes": 0}
+    
+    def reused_before(stop: int) -> List[Dict[str, Any]]:
+        """Events for the kept scenes of segments before stop that haven't been sent yet"""
+        events = []
+        while emitted["segments"] < stop:
+            for scene in reused.get(emitted["segments"], []):
+                emitted["scenes"] += 1
+                events.append({"type": "scene", "scene": {**scene, "scene_number": emitted["scenes"]}})
+            emitted["segments"] += 1
+        return events
+    
+    texts = [segmented_text([segments[i] for i in chunk]) for chunk in chunks]
+    previous = {chunk_index: chunk[0] for chunk_index, chunk in enumerate(chunks)}
+    async with aclosing(chunked_decomposition_items(api_key, texts, use_cache, stream)) as items:
+        async for chunk_index, kind, item in items:
+            if kind == "scene":
+                if not item.get("description"):
+                    logger.warning("Skipping decomposed scene without a description")
+                    continue
+                index = scene_segment(item, chunks[chunk_index], previous[chunk_index])
+                previous[chunk_index] = index
+                for event in reused_before(index):
+                    yield event
+                emitted["scenes"] += 1
+                scene_doc = build_scene_doc(project_id, {**item, "scene_number": emitted["scenes"]}, now)
+                scene_doc["segment_key"] = keys[index]
+                fresh[index].append(scene_doc)
+                yield {"type": "scene", "scene": scene_doc}
+                continue
+            name = item.get("name", "").strip()
+            if not name:
+                continue
+            known = characters.get(name.lower())
+            if known is None:
+                char_doc = build_character_doc(project_id, {**item, "name": name}, now)
+                characters[name.lower()] = char_doc
+                yield {"type": "character", "character": char_doc}
+            elif name.lower() not in existing_names:
+                # The first description of a new character wins; later chunks only fill gaps
+                for field in ("appearance", "clothing", "age", "style"):
+                    if not known.get(field) and item.get(field):
+                        known[field] = item[field]
+                characters[name.lower()] = {**build_character_doc(project_id, known, now),
+                                            "character_id": known["character_id"]}
+    for event in reused_before(len(segments)):
+        yield event
+    
+    scenes: List[Dict[str, Any]] = []
+    renumbered: List[UpdateOne] = []
+    for index in range(len(segments)):
+        for scene in reused.get(index, fresh.get(index, [])):
+            scene["scene_number"] = len(scenes) + 1
+            if index in reused:
+                renumbered.append(UpdateOne({"scene_id": scene["scene_id"]}, {"$set": {"scene_number": scene["scene_number"]}}))
+            else:
+                scene["characters"] = [characters.get(n.strip().lower(), {"name": n})["name"] for n in scene["characters"]]
+            scenes.append(scene)
+    if not scenes:
+        raise HTTPException(status_code=500, detail="Failed to decompose script")
+    
+    new_scenes = [scene for index in changed for scene in fresh[index]]
+    new_characters = [char for name, char in characters.items() if name not in existing_names]
+    kept_ids = {scene["scene_id"] for index in reused for scene in reused[index]}
+    stale_ids = [scene_id for scene_id in existing_ids if scene_id not in kept_ids]
+    empty_segment_keys = [keys[index] for index in range(len(segments)) if not reused.get(index, fresh.get(index))]
+    
+    async def write(session):
+        if mode == "full":
+            await db.scenes.delete_many({"project_id": project_id}, session=session)
+            await db.characters.delete_many({"project_id": project_id}, session=session)
+        elif stale_ids:
+            await db.scenes.delete_many({"scene_id": {"$in": stale_ids}}, session=session)
+        if new_scenes:
+            await db.scenes.insert_many(new_scenes, ordered=False, session=session)
+        if renumbered:
+            await db.scenes.bulk_write(renumbered, ordered=False, session=session)
+        if new_characters:
+            await db.characters.insert_many(new_characters, ordered=False, session=session)
+        await db.projects.update_one(
+            {"project_id": project_id},
+            {"$set": {"status": "scenes_generated", "empty_segment_keys": empty_segment_keys, "updated_at": now}},
+            session=session
+        )
+    
+    await run_in_transaction(write)
+    yield {
+        "type": "done",
+        # insert_many adds _id to the documents in place
+        "scenes": [{k: v for k, v in scene.items() if k != "_id"} for scene in scenes],
+        "characters": [{k: v for k, v in char.items() if k != "_id"} for char in characters.values()],
+        "segments": {"total": len(segments), "changed": len(changed), "reused": len(segments) - len(changed)}
+    }
+
+async def stream_decomposition(project_id: str, script: str, api_key: str, use_cache: bool,
+                               mode: str, sse: bool) -> AsyncIterator[str]:
+    """decompose_project's events as NDJSON or SSE, with failures reported as an error event"""
+    def event(payload: Dict[str, Any]) -> str:
+        data = json.dumps(payload, default=str)
+        return f"event: {payload['type']}\ndata: {data}\n\n" if sse else f"{data}\n"
+    
+    try:
+        # aclosing cancels the chunk producers as soon as the client goes away
+        async with aclosing(decompose_project(project_id, script, api_key, use_cache, mode)) as events:
+            async for payload in events:
+                yield event(payload)
+    except HTTPException as e:
+        yield event({"type": "error", "detail": e.detail})
+    except (httpx.RequestError, json.JSONDecodeError) as e:
+        logger.error(f"Streaming decomposition error: {e}")
+        yield event({"type": "error", "detail": "Failed to decompose script"})
+
+@api_router.post("/projects/{project_id}/decompose/stream")
+async def decompose_script_stream(project_id: str, request: Request, force: bool = False, mode: str = "full",
+                                  user: User = Depends(get_current_user)):
+    """Decompose a script, streaming scenes as NDJSON (or SSE with Accept: text/event-stream) as they are parsed.
+
+    Takes the same mode and force options as /decompose; the final done
+    event carries the stored scenes and characters.
+    """
+    project = await get_decomposable_project(project_id, mode, user)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    return StreamingResponse(
+        stream_decomposition(project_id, project["script"], user.gemini_api_key, not force, mode, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 # ==================== SCENE ROUTES ====================
 
+# Ids, status flags and asset URLs: enough to render progress without scene text or media
+SCENE_SUMMARY_FIELDS = [
+    "scene_id", "project_id", "scene_number",
+    "image_generated", "image_approved", "image_url",
+    "video_status", "video_approved", "video_url"
+]
+# Legacy inline payloads that are never returned from listings
+SCENE_HEAVY_FIELDS = ["image_full_data"]
+SCENE_SELECTABLE_FIELDS = (set(Scene.model_fields) | {"image_generated"}) - set(SCENE_HEAVY_FIELDS)
+
+def scene_projection(view: str = "full", fields: Optional[str] = None) -> Dict[str, int]:
+    """MongoDB projection for a scene listing view or explicit comma-separated field list"""
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in SCENE_SELECTABLE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown scene fields: {', '.join(unknown)}")
+        return {"_id": 0, "scene_id": 1, **{f: 1 for f in requested}}
+    if view == "summary":
+        return {"_id": 0, **{f: 1 for f in SCENE_SUMMARY_FIELDS}}
+    if view == "full":
+        return {"_id": 0, **{f: 0 for f in SCENE_HEAVY_FIELDS}}
+    raise HTTPException(status_code=400, detail="view must be 'summary' or 'full'")
+
 @api_router.get("/projects/{project_id}/scenes")
-async def get_scenes(project_id: str, user: User = Depends(get_current_user)):
-    """Get all scenes for a project"""
+async def get_scenes(project_id: str, view: str = "full", fields: Optional[str] = None,
+                     user: User = Depends(get_current_user)):
+    """Get all scenes for a project, optionally as a summary or a subset of fields"""
+    projection = scene_projection(view, fields)
+    
     project = await db.projects.find_one(
         {"project_id": project_id, "user_id": user.user_id},
-        {"_id": 0}
+        {"_id": 0, "project_id": 1}
     )
     
     if not project:
@@ -572,7 +1998,7 @@ async def get_scenes(project_id: str, user: User = Depends(get_current_user)):
     
     scenes = await db.scenes.find(
         {"project_id": project_id},
-        {"_id": 0}
+        projection
     ).sort("scene_number", 1).to_list(100)
     
     return {"scenes": scenes}
@@ -731,11 +2157,602 @@ async def delete_character(project_id: str, character_id: str, user: User = Depe
     
     return {"message": "Character deleted successfully"}
 
+# ==================== PROJECT EVENTS ====================
+#
+# Scene, job and project state transitions are pushed to clients over
+# GET /api/projects/{id}/events instead of being polled. Writers publish to an
+# in-process bus; with PROJECT_EVENTS_CHANGE_STREAM the bus is instead fed from
+# a MongoDB change stream so that writes made by other processes are seen too.
+
+# Scene fields whose changes are forwarded to subscribers
+SCENE_EVENT_FIELDS = {
+    "video_status", "video_url", "video_approved", "video_stream",
+    "image_generated", "image_url", "image_digest", "image_approved"
+}
+
+class ProjectEventBus:
+    """In-process fan-out of project events to per-subscriber queues"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # True while the change-stream listener is the source of database-backed events
+        self.db_sourced = False
+
+    @asynccontextmanager
+    async def subscribe(self, project_id: str):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(project_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(project_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[project_id]
+
+    def publish(self, project_id: str, event: Dict[str, Any]):
+        for queue in self._subscribers.get(project_id, ()):
+            if queue.full():
+                # A slow client loses its oldest event rather than stalling writers
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+project_events = ProjectEventBus(PROJECT_EVENTS_QUEUE_SIZE)
+
+def job_event(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": "job",
+        "job_id": job["job_id"],
+        "job_type": job["type"],
+        "scene_id": job.get("scene_id"),
+        "status": job["status"],
+        "progress": job.get("progress", {})
+    }
+
+def emit_db_event(project_id: str, event: Dict[str, Any]):
+    """Publish an event for a database write, unless the change stream will report it"""
+    if not project_events.db_sourced:
+        project_events.publish(project_id, event)
+
+async def set_scene_fields(project_id: str, scene_id: str, fields: Dict[str, Any]):
+    """Update a scene and notify subscribers of the changed fields"""
+    await db.scenes.update_one({"scene_id": scene_id}, {"$set": fields})
+    changes = {k: v for k, v in fields.items() if k in SCENE_EVENT_FIELDS}
+    if changes:
+        emit_db_event(project_id, {"type": "scene", "scene_id": scene_id, "changes": changes})
+
+async def set_project_status(project_id: str, status: str):
+    """Update a project's status and notify subscribers"""
+    await db.projects.update_one(
+        {"project_id": project_id},
+        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    emit_db_event(project_id, {"type": "project", "status": status})
+
+async def watch_project_events():
+    """Feed the project event bus from scene, job and project writes made by any process"""
+    pipeline = [{"$match": {
+        "ns.coll": {"$in": ["scenes", "jobs", "projects"]},
+        "operationType": {"$in": ["insert", "update"]}
+    }}]
+    while True:
+        try:
+            async with db.watch(pipeline, full_document="updateLookup") as stream:
+                project_events.db_sourced = True
+                logger.info("Project event change-stream listener started")
+                async for change in stream:
+                    document = change.get("fullDocument")
+                    if not document or not document.get("project_id"):
+                        continue
+                    collection = change["ns"]["coll"]
+                    updated = change.get("updateDescription", {}).get("updatedFields", {})
+                    if collection == "scenes" and change["operationType"] == "update":
+                        changes = {k: v for k, v in updated.items() if k in SCENE_EVENT_FIELDS}
+                        if changes:
+                            project_events.publish(document["project_id"], {
+                                "type": "scene", "scene_id": document["scene_id"], "changes": changes
+                            })
+                    elif collection == "jobs":
+                        # Heartbeats only touch the lease and are not worth forwarding
+                        if change["operationType"] == "insert" or {"status", "progress"} & updated.keys():
+                            project_events.publish(document["project_id"], job_event(document))
+                    elif collection == "projects":
+                        if "status" in updated:
+                            project_events.publish(document["project_id"], {
+                                "type": "project", "status": document["status"]
+                            })
+                        if "final_stream" in updated:
+                            project_events.publish(document["project_id"], {
+                                "type": "stream", "name": "final", **document["final_stream"]
+                            })
+        except asyncio.CancelledError:
+            project_events.db_sourced = False
+            raise
+        except OperationFailure as e:
+            project_events.db_sourced = False
+            if e.code == 40573:
+                logger.warning("Change streams need a replica set; project events only cover this process")
+                return
+            logger.error(f"Project event change stream error: {e}; retrying in 10s")
+            await asyncio.sleep(10)
+        except Exception as e:
+            project_events.db_sourced = False
+            logger.error(f"Project event change stream error: {e}; retrying in 10s")
+            await asyncio.sleep(10)
+
+@api_router.get("/projects/{project_id}/events")
+async def project_event_stream(project_id: str, request: Request, user: User = Depends(get_current_user)):
+    """Server-sent events for scene, job, project and assembly state changes"""
+    project = await db.projects.find_one(
+        {"project_id": project_id, "user_id": user.user_id},
+        {"_id": 0, "project_id": 1}
+    )
+    
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    async def events() -> AsyncIterator[str]:
+        async with project_events.subscribe(project_id) as queue:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=PROJECT_EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ==================== IDEMPOTENCY ====================
+#
+# Clients may send an Idempotency-Key header on generation and assembly
+# requests. The first request with a key records it as in progress and runs;
+# duplicates in the same process await the same result, duplicates in other
+# processes wait for the stored outcome, and later retries replay the stored
+# response. Failed requests release their key so they can be retried.
+
+# scope -> (request fingerprint, future resolved with the response)
+_idempotent_requests: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+IDEMPOTENCY_KEY_REUSED = "Idempotency-Key was already used with different parameters"
+
+def _stored_response(doc: Dict[str, Any]) -> JSONResponse:
+    return JSONResponse(status_code=doc["status_code"], content=doc["response"],
+                        headers={"Idempotent-Replayed": "true"})
+
+async def _wait_for_idempotent_result(scope: str) -> Optional[Dict[str, Any]]:
+    """Poll until the request holding scope finishes; None once the key is released or abandoned"""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        doc = await db.idempotency_keys.find_one({"scope": scope}, {"_id": 0})
+        if doc is None:
+            return None
+        if doc["status"] == "completed":
+            return doc
+        if doc["created_at"].replace(tzinfo=timezone.utc) < datetime.now(timezone.utc) - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS):
+            await db.idempotency_keys.delete_one({"scope": scope, "status": "in_progress", "created_at": doc["created_at"]})
+            return None
+        await asyncio.sleep(0.5)
+    raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+
+async def _run_idempotent_once(scope: str, fingerprint: str, status_code: int,
+                               handler: Callable[[], Awaitable[Any]]) -> Any:
+    while True:
+        try:
+            await db.idempotency_keys.insert_one({
+                "scope": scope,
+                "fingerprint": fingerprint,
+                "status": "in_progress",
+                "created_at": datetime.now(timezone.utc)
+            })
+            break
+        except DuplicateKeyError:
+            doc = await db.idempotency_keys.find_one({"scope": scope}, {"_id": 0, "fingerprint": 1})
+            if doc and doc["fingerprint"] != fingerprint:
+                raise HTTPException(status_code=422, detail=IDEMPOTENCY_KEY_REUSED)
+            doc = await _wait_for_idempotent_result(scope)
+            if doc is not None:
+                return _stored_response(doc)
+    
+    try:
+        result = await handler()
+    except BaseException:
+        # Failures are not replayed; release the key so the client can retry
+        await db.idempotency_keys.delete_one({"scope": scope})
+        raise
+    
+    await db.idempotency_keys.update_one(
+        {"scope": scope},
+        {"$set": {"status": "completed", "status_code": status_code, "response": jsonable_encoder(result)}}
+    )
+    return result
+
+async def run_idempotent(request: Request, user: User, status_code: int,
+                         handler: Callable[[], Awaitable[Any]]) -> Any:
+    """Run handler at most once per (user, endpoint, Idempotency-Key), replaying its response to duplicates"""
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        return await handler()
+    if len(key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be at most 255 characters")
+    
+    scope = hashlib.sha256(f"{user.user_id}\n{request.method}\n{request.url.path}\n{key}".encode("utf-8")).hexdigest()
+    fingerprint = hashlib.sha256(str(request.url.query).encode("utf-8")).hexdigest()
+    
+    inflight = _idempotent_requests.get(scope)
+    if inflight is not None:
+        inflight_fingerprint, inflight_future = inflight
+        if inflight_fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail=IDEMPOTENCY_KEY_REUSED)
+        return await asyncio.shield(inflight_future)
+    
+    future = asyncio.get_running_loop().create_future()
+    _idempotent_requests[scope] = (fingerprint, future)
+    try:
+        result = await _run_idempotent_once(scope, fingerprint, status_code, handler)
+    except Exception as e:
+        future.set_exception(e)
+        # Mark it retrieved so a future nobody else awaited isn't logged as unhandled
+        future.exception()
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _idempotent_requests.pop(scope, None)
+
+# ==================== JOB QUEUE ====================
+#
+# Generation work runs in workers that drain the `jobs` collection instead of
+# inside the request handler. A worker claims a job by taking a lease on it and
+# keeps the lease alive with heartbeats; a job whose lease expires (worker
+# crashed or was killed) becomes claimable again. Workers run in-process
+# (JOB_WORKERS_IN_PROCESS) and/or as separate processes via `python -m worker`.
+
+JobHandler = Callable[[Dict[str, Any], User], Awaitable[Optional[Dict[str, Any]]]]
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+def job_handler(job_type: str):
+    """Register a coroutine as the handler for a job type"""
+    def decorator(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+def new_worker_id(index: int = 0) -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{index}"
+
+def job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a job document"""
+    return {
+        "job_id": job["job_id"],
+        "type": job["type"],
+        "status": job["status"],
+        "project_id": job["project_id"],
+        "scene_id": job.get("scene_id"),
+        "attempts": job.get("attempts", 0),
+        "progress": job.get("progress", {}),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "updated_at": job.get("updated_at"),
+    }
+
+async def enqueue_job(job_type: str, user_id: str, project_id: str, scene_id: Optional[str] = None,
+                      payload: Optional[Dict[str, Any]] = None, max_attempts: int = JOB_MAX_ATTEMPTS,
+                      coalesce: bool = False) -> Dict[str, Any]:
+    """Insert a queued job and return its document.
+
+    With coalesce, an identical job that is still queued or running is
+    returned instead of queueing the same work twice.
+    """
+    if coalesce:
+        active = await db.jobs.find_one(
+            {
+                "type": job_type,
+                "project_id": project_id,
+                "scene_id": scene_id,
+                "payload": payload or {},
+                "status": {"$in": ["queued", "running"]}
+            },
+            {"_id": 0}
+        )
+        if active:
+            logger.info(f"Coalesced {job_type} request onto active job {active['job_id']}")
+            return active
+    
+    job = Job(
+        type=job_type,
+        user_id=user_id,
+        project_id=project_id,
+        scene_id=scene_id,
+        payload=payload or {},
+        max_attempts=max_attempts
+    ).model_dump()
+    await db.jobs.insert_one(job)
+    job.pop("_id", None)
+    emit_db_event(project_id, job_event(job))
+    logger.info(f"Queued {job_type} job {job['job_id']} for project {project_id}")
+    return job
+
+async def claim_next_job(worker_id: str) -> Optional[Dict[str, Any]]:
+    """Atomically lease the oldest runnable job (queued, or running with an expired lease)"""
+    now = datetime.now(timezone.utc)
+    job = await db.jobs.find_one_and_update(
+        {"$or": [
+            {"status": "queued", "run_after": {"$lte": now}},
+            {"status": "running", "lease_expires_at": {"$lt": now}}
+        ]},
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "heartbeat_at": now,
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        projection={"_id": 0},
+        sort=[("run_after", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+    if job:
+        emit_db_event(job["project_id"], job_event(job))
+    return job
+
+async def update_job_progress(job: Dict[str, Any], progress: Dict[str, Any]):
+    """Record partial progress on a running job"""
+    job["progress"] = progress
+    await db.jobs.update_one(
+        {"job_id": job["job_id"], "worker_id": job["worker_id"]},
+        {"$set": {"progress": progress, "updated_at": datetime.now(timezone.utc)}}
+    )
+    emit_db_event(job["project_id"], job_event(job))
+
+async def _heartbeat_job(job_id: str, worker_id: str):
+    """Extend the lease on a job for as long as its handler is running"""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        now = datetime.now(timezone.utc)
+        result = await db.jobs.update_one(
+            {"job_id": job_id, "worker_id": worker_id, "status": "running"},
+            {"$set": {
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "heartbeat_at": now
+            }}
+        )
+        if result.matched_count == 0:
+            logger.warning(f"Worker {worker_id} lost lease on job {job_id}")
+            return
+
+async def _finish_job(job: Dict[str, Any], worker_id: str, update: Dict[str, Any]):
+    update["updated_at"] = datetime.now(timezone.utc)
+    update["lease_expires_at"] = None
+    if update["status"] in ("completed", "failed"):
+        # Starts the retention clock (finished_at_ttl); re-queued jobs leave it unset
+        update["finished_at"] = update["updated_at"]
+    await db.jobs.update_one(
+        {"job_id": job["job_id"], "worker_id": worker_id},
+        {"$set": update}
+    )
+    emit_db_event(job["project_id"], job_event({**job, **update}))
+
+async def run_job(job: Dict[str, Any], worker_id: str):
+    """Execute a leased job and record its outcome, re-queueing retryable failures"""
+    job_id = job["job_id"]
+    handler = JOB_HANDLERS.get(job["type"])
+    if handler is None:
+        await _finish_job(job, worker_id, {"status": "failed", "error": f"Unknown job type: {job['type']}"})
+        return
+    if job["attempts"] > job["max_attempts"]:
+        await _finish_job(job, worker_id, {"status": "failed", "error": "Job exceeded maximum attempts"})
+        return
+
+    logger.info(f"Worker {worker_id} running {job['type']} job {job_id} (attempt {job['attempts']})")
+    heartbeat = asyncio.create_task(_heartbeat_job(job_id, worker_id))
+    try:
+        user_doc = await db.users.find_one({"user_id": job["user_id"]}, {"_id": 0})
+        if not user_doc:
+            raise HTTPException(status_code=404, detail="User not found")
+        result = await handler(job, User(**user_doc))
+    except ProviderBackoff as e:
+        # Over quota or provider circuit open is not a failure: wait it out without using up an attempt
+        logger.info(f"Job {job_id} deferred ({e.detail}), re-queued for {e.retry_after:.0f}s")
+        await _finish_job(job, worker_id, {
+            "status": "queued",
+            "attempts": job["attempts"] - 1,
+            "run_after": datetime.now(timezone.utc) + timedelta(seconds=e.retry_after)
+        })
+    except Exception as e:
+        # Client errors (missing key, deleted scene, ...) will not succeed on retry
+        retryable = not (isinstance(e, HTTPException) and e.status_code < 500)
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        if retryable and job["attempts"] < job["max_attempts"]:
+            delay = JOB_RETRY_DELAY_SECONDS * (2 ** (job["attempts"] - 1))
+            logger.warning(f"Job {job_id} failed ({error}), retrying in {delay}s")
+            await _finish_job(job, worker_id, {
+                "status": "queued",
+                "error": error,
+                "run_after": datetime.now(timezone.utc) + timedelta(seconds=delay)
+            })
+        else:
+            logger.error(f"Job {job_id} failed: {error}")
+            await _finish_job(job, worker_id, {"status": "failed", "error": error})
+    else:
+        await _finish_job(job, worker_id, {"status": "completed", "result": result, "error": None})
+        logger.info(f"Job {job_id} completed")
+    finally:
+        heartbeat.cancel()
+
+async def job_worker_loop(worker_id: str, stop_event: asyncio.Event):
+    """Claim and run jobs until stop_event is set"""
+    logger.info(f"Job worker {worker_id} started")
+    while not stop_event.is_set():
+        try:
+            job = await claim_next_job(worker_id)
+        except Exception as e:
+            logger.error(f"Job worker {worker_id} failed to claim job: {e}")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        await run_job(job, worker_id)
+    logger.info(f"Job worker {worker_id} stopped")
+
+# ==================== CONCURRENT GENERATION ====================
+
+_generation_semaphore: Optional[asyncio.Semaphore] = None
+_user_generation_semaphores: Dict[str, asyncio.Semaphore] = {}
+# Tasks holding or waiting on each user's semaphore; it is dropped once the count is back to zero
+_user_generation_refs: Dict[str, int] = {}
+
+@asynccontextmanager
+async def generation_slot(user_id: str):
+    """Hold one per-user and one global generation slot"""
+    global _generation_semaphore
+    if _generation_semaphore is None:
+        _generation_semaphore = asyncio.Semaphore(GENERATION_GLOBAL_CONCURRENCY)
+    user_semaphore = _user_generation_semaphores.get(user_id)
+    if user_semaphore is None:
+        user_semaphore = asyncio.Semaphore(GENERATION_PER_USER_CONCURRENCY)
+        _user_generation_semaphores[user_id] = user_semaphore
+    _user_generation_refs[user_id] = _user_generation_refs.get(user_id, 0) + 1
+    try:
+        # Always take the per-user slot first so a single user can't pin global slots while waiting
+        async with user_semaphore:
+            async with _generation_semaphore:
+                yield
+    finally:
+        _user_generation_refs[user_id] -= 1
+        if not _user_generation_refs[user_id]:
+            del _user_generation_refs[user_id]
+            del _user_generation_semaphores[user_id]
+
+SceneGenerator = Callable[[str, str, User], Awaitable[Dict[str, Any]]]
+
+async def fan_out_scenes(job: Dict[str, Any], user: User, scenes: List[Dict[str, Any]],
+                         generate: SceneGenerator) -> List[Dict[str, Any]]:
+    """Run generate() for every scene concurrently under the generation caps.
+
+    A failing scene is recorded in the results without cancelling the others,
+    and the job's progress is updated as each scene finishes. Scenes that
+    succeeded on an earlier attempt of the job are skipped. If any scene was
+    deferred by a rate limit or open circuit, ProviderBackoff is raised
+    afterwards so the job is re-queued for the remaining scenes.
+    """
+    project_id = job["project_id"]
+    results = [r for r in job.get("progress", {}).get("results", []) if r["success"]]
+    done = {r["scene_id"] for r in results}
+    pending = [scene for scene in scenes if scene["scene_id"] not in done]
+    progress_lock = asyncio.Lock()
+    retry_after: List[float] = []
+
+    async def run_scene(scene: Dict[str, Any]):
+        try:
+            async with generation_slot(user.user_id):
+                await generate(project_id, scene["scene_id"], user)
+            outcome = {"scene_id": scene["scene_id"], "success": True}
+        except ProviderBackoff as e:
+            retry_after.append(e.retry_after)
+            outcome = {"scene_id": scene["scene_id"], "success": False, "error": e.detail}
+        except Exception as e:
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            outcome = {"scene_id": scene["scene_id"], "success": False, "error": error}
+        async with progress_lock:
+            results.append(outcome)
+            await update_job_progress(job, {
+                "total": len(scenes),
+                "completed": len(results),
+                "failed": sum(1 for r in results if not r["success"]),
+                "results": results
+            })
+
+    await asyncio.gather(*(run_scene(scene) for scene in pending))
+    if retry_after:
+        raise ProviderBackoff(503, "Some scenes are waiting on the provider", max(retry_after))
+
+    order = {scene["scene_id"]: i for i, scene in enumerate(scenes)}
+    results.sort(key=lambda r: order.get(r["scene_id"], len(order)))
+    return results
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str, user: User = Depends(get_current_user)):
+    """Get the status and result of a background job"""
+    job = await db.jobs.find_one({"job_id": job_id, "user_id": user.user_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+@api_router.get("/projects/{project_id}/jobs")
+async def get_project_jobs(project_id: str, status: Optional[str] = None, user: User = Depends(get_current_user)):
+    """List recent background jobs for a project"""
+    query: Dict[str, Any] = {"project_id": project_id, "user_id": user.user_id}
+    if status:
+        query["status"] = status
+    jobs = await db.jobs.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
+    return {"jobs": [job_response(job) for job in jobs]}
+
 # ==================== IMAGE GENERATION ====================
 
-@api_router.post("/projects/{project_id}/scenes/{scene_id}/generate-image")
-async def generate_scene_image(project_id: str, scene_id: str, user: User = Depends(get_current_user)):
-    """Generate image for a scene using Gemini Nano Banana"""
+def image_generation_cache_key(prompt: str) -> str:
+    """Hash of the normalized prompt, model and params; whitespace-only edits map to the same key"""
+    normalized = "\n".join(" ".join(line.split()) for line in prompt.strip().splitlines())
+    key_source = json.dumps(
+        {"model": IMAGE_MODEL, "params": IMAGE_MODEL_PARAMS, "prompt": normalized},
+        sort_keys=True
+    )
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+async def _evict_image_generation_cache():
+    """Drop least recently used entries beyond IMAGE_GEN_CACHE_MAX_ENTRIES"""
+    excess = await db.image_generation_cache.estimated_document_count() - IMAGE_GEN_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    stale = await db.image_generation_cache.find({}, {"_id": 1}).sort("last_used_at", 1).to_list(excess)
+    await db.image_generation_cache.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+async def _lookup_generated_image(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Return the cached blob reference for a prompt, if its blob is still on disk"""
+    cached = await db.image_generation_cache.find_one_and_update(
+        {"cache_key": cache_key},
+        {"$set": {"last_used_at": datetime.now(timezone.utc)}, "$inc": {"hits": 1}},
+        projection={"_id": 0, "digest": 1, "mime_type": 1}
+    )
+    if cached and blob_store.exists(cached["digest"]):
+        return cached
+    return None
+
+async def _store_generated_image(cache_key: str, digest: str, mime_type: str):
+    now = datetime.now(timezone.utc)
+    await db.image_generation_cache.update_one(
+        {"cache_key": cache_key},
+        {
+            "$set": {"digest": digest, "mime_type": mime_type, "last_used_at": now},
+            "$setOnInsert": {"cache_key": cache_key, "model": IMAGE_MODEL, "created_at": now, "hits": 0}
+        },
+        upsert=True
+    )
+    await _evict_image_generation_cache()
+
+async def _generate_scene_image(project_id: str, scene_id: str, user: User, force: bool = False) -> Dict[str, Any]:
+    """Generate image for a scene using Gemini Nano Banana, reusing the image of an identical prompt unless forced"""
     if not user.gemini_api_key:
         raise HTTPException(status_code=400, detail="API key not set")
     
@@ -759,7 +2776,7 @@ async def generate_scene_image(project_id: str, scene_id: str, user: User = Depe
     characters = await db.characters.find(
         {"project_id": project_id, "name": {"$in": scene.get("characters", [])}},
         {"_id": 0}
-    ).to_list(100)
+    ).sort("name", 1).to_list(100)
     
     # Build character reference prompt
     char_refs = ""
@@ -778,50 +2795,79 @@ Character References (maintain these exact appearances):{char_refs}
 Style: Photorealistic, cinematic lighting, professional film quality, 1080p HD resolution.
 Important: Maintain consistent character appearances as described."""
 
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        chat = LlmChat(
-            api_key=user.gemini_api_key,
-            session_id=f"image-gen-{scene_id}-{uuid.uuid4().hex[:8]}",
-            system_message="You are a professional cinematic image generator."
-        )
-        chat.with_model("gemini", "gemini-3-pro-image-preview").with_params(modalities=["image", "text"])
-        
-        msg = UserMessage(text=image_prompt)
-        text_response, images = await chat.send_message_multimodal_response(msg)
-        
-        if images and len(images) > 0:
-            image_data = images[0]["data"]
+    cache_key = image_generation_cache_key(image_prompt)
+    cached = None if force else await _lookup_generated_image(cache_key)
+    
+    if cached:
+        logger.info(f"Image generation cache hit {cache_key[:12]} for scene {scene_id}")
+        digest, mime_type = cached["digest"], cached["mime_type"]
+    else:
+        try:
+            from emergentintegrations.llm.chat import LlmChat, UserMessage
             
-            # Save image reference (truncated for DB)
-            await db.scenes.update_one(
-                {"scene_id": scene_id},
-                {"$set": {
-                    "image_base64": image_data[:100] + "...(truncated)",  # Store truncated for reference
-                    "image_generated": True,
-                    "image_full_data": image_data  # Store full data
-                }}
-            )
+            async def send():
+                # A fresh chat per attempt so a rate-limited try leaves no history behind
+                chat = LlmChat(
+                    api_key=user.gemini_api_key,
+                    session_id=f"image-gen-{scene_id}-{uuid.uuid4().hex[:8]}",
+                    system_message="You are a professional cinematic image generator."
+                )
+                chat.with_model("gemini", IMAGE_MODEL).with_params(**IMAGE_MODEL_PARAMS)
+                return await chat.send_message_multimodal_response(UserMessage(text=image_prompt))
             
-            return {
-                "success": True,
-                "scene_id": scene_id,
-                "image_data": image_data,
-                "mime_type": images[0].get("mime_type", "image/png")
-            }
-        else:
+            text_response, images = await call_provider("gemini", send, api_key=user.gemini_api_key, model=IMAGE_MODEL)
+        except ImportError:
+            raise HTTPException(status_code=500, detail="Image generation library not available")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Image generation error: {e}")
+            raise HTTPException(status_code=500, detail=f"Image generation failed: {str(e)}")
+        
+        if not images:
             raise HTTPException(status_code=500, detail="No image generated")
-            
-    except ImportError:
-        raise HTTPException(status_code=500, detail="Image generation library not available")
-    except Exception as e:
-        logger.error(f"Image generation error: {e}")
-        raise HTTPException(status_code=500, detail=f"Image generation failed: {str(e)}")
+        
+        mime_type = images[0].get("mime_type", "image/png")
+        digest = await blob_store.put(base64.b64decode(images[0]["data"]), mime_type)
+        await _store_generated_image(cache_key, digest, mime_type)
+    
+    # Only the blob reference lives on the scene
+    fields = {
+        "image_base64": None,
+        "image_generated": True,
+        "image_digest": digest,
+        "image_mime_type": mime_type,
+        "image_url": scene_image_url(project_id, scene_id, digest)
+    }
+    await db.scenes.update_one(
+        {"scene_id": scene_id},
+        {"$set": fields, "$unset": {"image_full_data": ""}}
+    )
+    emit_db_event(project_id, {
+        "type": "scene",
+        "scene_id": scene_id,
+        "changes": {k: v for k, v in fields.items() if k in SCENE_EVENT_FIELDS}
+    })
+    
+    return {
+        "success": True,
+        "scene_id": scene_id,
+        "image_digest": digest,
+        "image_url": scene_image_url(project_id, scene_id, digest),
+        "mime_type": mime_type,
+        "cached": bool(cached)
+    }
+
+@job_handler("generate_image")
+async def run_generate_image_job(job: Dict[str, Any], user: User) -> Dict[str, Any]:
+    async with generation_slot(user.user_id):
+        return await _generate_scene_image(job["project_id"], job["scene_id"], user,
+                                           force=job["payload"].get("force", False))
 
-@api_router.post("/projects/{project_id}/generate-all-images")
-async def generate_all_images(project_id: str, user: User = Depends(get_current_user)):
-    """Generate images for all scenes in a project"""
+@api_router.post("/projects/{project_id}/scenes/{scene_id}/generate-image", status_code=202)
+async def generate_scene_image(project_id: str, scene_id: str, request: Request, force: bool = False,
+                               user: User = Depends(get_current_user)):
+    """Queue image generation for a scene; poll /jobs/{job_id} for the result. force=true skips the prompt cache."""
     if not user.gemini_api_key:
         raise HTTPException(status_code=400, detail="API key not set")
     
@@ -833,32 +2879,138 @@ async def generate_all_images(project_id: str, user: User = Depends(get_current_
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    scenes = await db.scenes.find(
-        {"project_id": project_id},
+    scene = await db.scenes.find_one(
+        {"scene_id": scene_id, "project_id": project_id},
         {"_id": 0}
-    ).sort("scene_number", 1).to_list(100)
+    )
     
-    results = []
-    for scene in scenes:
-        try:
-            # Generate image for each scene (reuse the existing endpoint logic)
-            result = await generate_scene_image(project_id, scene["scene_id"], user)
-            results.append({"scene_id": scene["scene_id"], "success": True})
-        except Exception as e:
-            results.append({"scene_id": scene["scene_id"], "success": False, "error": str(e)})
+    if not scene:
+        raise HTTPException(status_code=404, detail="Scene not found")
     
-    # Update project status
-    await db.projects.update_one(
-        {"project_id": project_id},
-        {"$set": {"status": "images_generated", "updated_at": datetime.now(timezone.utc).isoformat()}}
+    async def queue():
+        job = await enqueue_job("generate_image", user.user_id, project_id, scene_id=scene_id,
+                                payload={"force": force}, coalesce=True)
+        return job_response(job)
+    
+    return await run_idempotent(request, user, 202, queue)
+
+@api_router.get("/projects/{project_id}/scenes/{scene_id}/image")
+async def get_scene_image(project_id: str, scene_id: str, request: Request, v: Optional[str] = None,
+                          user: User = Depends(get_current_user)):
+    """Serve the generated image for a scene as raw bytes"""
+    project = await db.projects.find_one(
+        {"project_id": project_id, "user_id": user.user_id},
+        {"_id": 0, "project_id": 1}
     )
     
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    scene = await db.scenes.find_one(
+        {"scene_id": scene_id, "project_id": project_id},
+        {"_id": 0, "image_digest": 1, "image_mime_type": 1}
+    )
+    
+    if not scene or not scene.get("image_digest"):
+        raise HTTPException(status_code=404, detail="Image not generated yet")
+    
+    digest = scene["image_digest"]
+    # Only the versioned URL is immutable; the bare URL must revalidate since regeneration changes it
+    cache_control = IMAGE_CACHE_CONTROL if v == digest[:16] else "private, no-cache"
+    return await blob_response(request, digest, scene.get("image_mime_type") or "image/png", cache_control)
+
+@job_handler("generate_all_images")
+async def run_generate_all_images_job(job: Dict[str, Any], user: User) -> Dict[str, Any]:
+    project_id = job["project_id"]
+    query: Dict[str, Any] = {"project_id": project_id}
+    if job["payload"].get("missing_only"):
+        query["image_generated"] = {"$ne": True}
+    scenes = await db.scenes.find(
+        query,
+        {"_id": 0, "scene_id": 1, "scene_number": 1}
+    ).sort("scene_number", 1).to_list(100)
+    
+    force = job["payload"].get("force", False)
+    
+    async def generate(project_id: str, scene_id: str, user: User) -> Dict[str, Any]:
+        return await _generate_scene_image(project_id, scene_id, user, force=force)
+    
+    results = await fan_out_scenes(job, user, scenes, generate)
+    
+    await set_project_status(project_id, "images_generated")
+    
     return {"results": results}
 
+@api_router.post("/projects/{project_id}/generate-all-images", status_code=202)
+async def generate_all_images(project_id: str, request: Request, force: bool = False, missing_only: bool = False,
+                              user: User = Depends(get_current_user)):
+    """Queue image generation for all scenes in a project (missing_only=true: those without an image).
+
+    force=true skips the prompt cache.
+    """
+    if not user.gemini_api_key:
+        raise HTTPException(status_code=400, detail="API key not set")
+    
+    project = await db.projects.find_one(
+        {"project_id": project_id, "user_id": user.user_id},
+        {"_id": 0}
+    )
+    
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    async def queue():
+        job = await enqueue_job("generate_all_images", user.user_id, project_id,
+                                payload={"force": force, "missing_only": missing_only}, coalesce=True)
+        return job_response(job)
+    
+    return await run_idempotent(request, user, 202, queue)
+
+# ==================== VEO PROVIDER ====================
+
+_veo_executor: Optional[ThreadPoolExecutor] = None
+
+def get_veo_executor() -> ThreadPoolExecutor:
+    global _veo_executor
+    if _veo_executor is None:
+        _veo_executor = ThreadPoolExecutor(max_workers=VEO_THREAD_POOL_SIZE, thread_name_prefix="veo")
+    return _veo_executor
+
+class VeoProvider:
+    """Async adapter over the google-genai Veo API.
+
+    Requests go through the SDK's async client so polling many operations
+    never blocks the event loop; writing a finished clip to disk runs on a
+    small dedicated thread pool.
+    """
+
+    def __init__(self, api_key: str):
+        from google import genai
+        self._client = genai.Client(api_key=api_key)
+
+    async def generate(self, prompt: str, model: str = VEO_MODEL, aspect_ratio: str = "16:9"):
+        from google.genai import types
+        return await self._client.aio.models.generate_videos(
+            model=model,
+            prompt=prompt,
+            config=types.GenerateVideosConfig(
+                aspect_ratio=aspect_ratio,
+                number_of_videos=1,
+            )
+        )
+
+    async def refresh(self, operation):
+        return await self._client.aio.operations.get(operation)
+
+    async def save(self, video, path: Path):
+        if getattr(video, "video_bytes", None) is None and getattr(video, "uri", None):
+            video.video_bytes = await self._client.aio.files.download(file=video)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(get_veo_executor(), video.save, str(path))
+
 # ==================== VIDEO GENERATION ====================
 
-@api_router.post("/projects/{project_id}/scenes/{scene_id}/generate-video")
-async def generate_scene_video(project_id: str, scene_id: str, user: User = Depends(get_current_user)):
+async def _generate_scene_video(project_id: str, scene_id: str, user: User) -> Dict[str, Any]:
     """Generate video for a scene using Veo API"""
     if not user.gemini_api_key:
         raise HTTPException(status_code=400, detail="API key not set")
@@ -877,17 +3029,10 @@ async def generate_scene_video(project_id: str, scene_id: str, user: User = Depe
     if not scene:
         raise HTTPException(status_code=404, detail="Scene not found")
     
-    # Update status to generating
-    await db.scenes.update_one(
-        {"scene_id": scene_id},
-        {"$set": {"video_status": "generating"}}
-    )
+    await set_scene_fields(project_id, scene_id, {"video_status": "generating"})
     
     try:
-        from google import genai
-        from google.genai import types
-        
-        client = genai.Client(api_key=user.gemini_api_key)
+        veo = VeoProvider(user.gemini_api_key)
         
         # Build video prompt from scene data
         video_prompt = f"""Create a cinematic video for this scene:
@@ -900,14 +3045,9 @@ Style: Smooth cinematic motion, professional film quality, consistent characters
 
         logger.info(f"Starting Veo video generation for scene {scene_id}")
         
-        operation = client.models.generate_videos(
-            model="veo-2.0-generate-preview",
-            prompt=video_prompt,
-            config=types.GenerateVideosConfig(
-                aspect_ratio="16:9",
-                number_of_videos=1,
-            )
-        )
+        # Submitting is paid and not idempotent, so only the polling below is retried on transient errors
+        operation = await call_provider("veo", lambda: veo.generate(video_prompt),
+                                        api_key=user.gemini_api_key, model=VEO_MODEL, retry_transient=False)
         
         # Poll for completion
         max_wait = 300
@@ -915,11 +3055,11 @@ Style: Smooth cinematic motion, professional film quality, consistent characters
         while not operation.done and wait_time < max_wait:
             await asyncio.sleep(10)
             wait_time += 10
-            operation = client.operations.get(operation)
+            operation = await call_provider("veo", lambda: veo.refresh(operation))
             logger.info(f"Video gen progress for {scene_id}: {wait_time}s elapsed")
         
         if not operation.done:
-            await db.scenes.update_one({"scene_id": scene_id}, {"$set": {"video_status": "failed"}})
+            await set_scene_fields(project_id, scene_id, {"video_status": "failed"})
             raise HTTPException(status_code=504, detail="Video generation timed out")
         
         if operation.response and operation.response.generated_videos:
@@ -929,35 +3069,77 @@ Style: Smooth cinematic motion, professional film quality, consistent characters
             project_dir = VIDEOS_DIR / project_id
             project_dir.mkdir(exist_ok=True)
             video_path = project_dir / f"{scene_id}.mp4"
-            generated_video.video.save(str(video_path))
+            await call_provider("veo", lambda: veo.save(generated_video.video, video_path))
+            video_digest = await asyncio.to_thread(file_digest, video_path)
+            video_meta = await probe_clip(video_path)
             
             logger.info(f"Video saved for scene {scene_id} at {video_path}")
             
-            await db.scenes.update_one(
-                {"scene_id": scene_id},
-                {"$set": {
-                    "video_status": "completed",
-                    "video_file": str(video_path),
-                    "video_url": f"/api/projects/{project_id}/scenes/{scene_id}/video"
-                }}
-            )
+            await set_scene_fields(project_id, scene_id, {
+                "video_status": "completed",
+                "video_digest": video_digest,
+                "video_meta": video_meta,
+                "video_file": str(video_path),
+                "video_url": f"/api/projects/{project_id}/scenes/{scene_id}/video"
+            })
             
             return {"success": True, "scene_id": scene_id, "video_status": "completed"}
         else:
-            await db.scenes.update_one({"scene_id": scene_id}, {"$set": {"video_status": "failed"}})
+            await set_scene_fields(project_id, scene_id, {"video_status": "failed"})
             raise HTTPException(status_code=500, detail="No video generated from API")
         
     except ImportError:
         logger.error("google-genai library not available")
-        await db.scenes.update_one({"scene_id": scene_id}, {"$set": {"video_status": "failed"}})
+        await set_scene_fields(project_id, scene_id, {"video_status": "failed"})
         raise HTTPException(status_code=500, detail="Video generation library not available. Install google-genai.")
+    except ProviderBackoff:
+        # The job is re-queued, so the scene is waiting again rather than failed
+        await set_scene_fields(project_id, scene_id, {"video_status": "queued"})
+        raise
+    except ProviderUnavailable:
+        await set_scene_fields(project_id, scene_id, {"video_status": "failed"})
+        raise
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Video generation error: {e}")
-        await db.scenes.update_one({"scene_id": scene_id}, {"$set": {"video_status": "failed"}})
+        await set_scene_fields(project_id, scene_id, {"video_status": "failed"})
         raise HTTPException(status_code=500, detail=f"Video generation failed: {str(e)}")
 
+@job_handler("generate_video")
+async def run_generate_video_job(job: Dict[str, Any], user: User) -> Dict[str, Any]:
+    async with generation_slot(user.user_id):
+        return await _generate_scene_video(job["project_id"], job["scene_id"], user)
+
+@api_router.post("/projects/{project_id}/scenes/{scene_id}/generate-video", status_code=202)
+async def generate_scene_video(project_id: str, scene_id: str, request: Request,
+                               user: User = Depends(get_current_user)):
+    """Queue video generation for a scene; poll /jobs/{job_id} for the result"""
+    if not user.gemini_api_key:
+        raise HTTPException(status_code=400, detail="API key not set")
+    
+    project = await db.projects.find_one(
+        {"project_id": project_id, "user_id": user.user_id},
+        {"_id": 0}
+    )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    scene = await db.scenes.find_one(
+        {"scene_id": scene_id, "project_id": project_id},
+        {"_id": 0}
+    )
+    if not scene:
+        raise HTTPException(status_code=404, detail="Scene not found")
+    
+    async def queue():
+        job = await enqueue_job("generate_video", user.user_id, project_id, scene_id=scene_id, coalesce=True)
+        if job["status"] == "queued":
+            await set_scene_fields(project_id, scene_id, {"video_status": "queued"})
+        return job_response(job)
+    
+    return await run_idempotent(request, user, 202, queue)
+
 @api_router.get("/projects/{project_id}/scenes/{scene_id}/video")
 async def get_scene_video(project_id: str, scene_id: str, user: User = Depends(get_current_user)):
     """Serve the generated video file for a scene"""
@@ -966,9 +3148,27 @@ async def get_scene_video(project_id: str, scene_id: str, user: User = Depends(g
         raise HTTPException(status_code=404, detail="Video not generated yet")
     return FileResponse(str(video_path), media_type="video/mp4", filename=f"scene_{scene_id}.mp4")
 
-@api_router.post("/projects/{project_id}/generate-all-videos")
-async def generate_all_videos(project_id: str, user: User = Depends(get_current_user)):
-    """Generate videos for all APPROVED scenes"""
+@job_handler("generate_all_videos")
+async def run_generate_all_videos_job(job: Dict[str, Any], user: User) -> Dict[str, Any]:
+    project_id = job["project_id"]
+    query: Dict[str, Any] = {"project_id": project_id, "image_generated": True, "image_approved": True}
+    if job["payload"].get("missing_only"):
+        query["video_status"] = {"$ne": "completed"}
+    scenes = await db.scenes.find(
+        query,
+        {"_id": 0, "scene_id": 1, "scene_number": 1}
+    ).sort("scene_number", 1).to_list(100)
+    
+    results = await fan_out_scenes(job, user, scenes, _generate_scene_video)
+    
+    await set_project_status(project_id, "videos_generated")
+    
+    return {"results": results}
+
+@api_router.post("/projects/{project_id}/generate-all-videos", status_code=202)
+async def generate_all_videos(project_id: str, request: Request, missing_only: bool = False,
+                              user: User = Depends(get_current_user)):
+    """Queue video generation for all APPROVED scenes (missing_only=true: those without a finished video)"""
     if not user.gemini_api_key:
         raise HTTPException(status_code=400, detail="API key not set")
     
@@ -979,28 +3179,19 @@ async def generate_all_videos(project_id: str, user: User = Depends(get_current_
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    scenes = await db.scenes.find(
-        {"project_id": project_id, "image_generated": True, "image_approved": True},
-        {"_id": 0}
-    ).sort("scene_number", 1).to_list(100)
+    approved = await db.scenes.count_documents(
+        {"project_id": project_id, "image_generated": True, "image_approved": True}
+    )
     
-    if not scenes:
+    if not approved:
         raise HTTPException(status_code=400, detail="No approved images to generate videos from.")
     
-    results = []
-    for scene in scenes:
-        try:
-            result = await generate_scene_video(project_id, scene["scene_id"], user)
-            results.append({"scene_id": scene["scene_id"], "success": True})
-        except Exception as e:
-            results.append({"scene_id": scene["scene_id"], "success": False, "error": str(e)})
+    async def queue():
+        job = await enqueue_job("generate_all_videos", user.user_id, project_id,
+                                payload={"missing_only": missing_only}, coalesce=True)
+        return job_response(job)
     
-    await db.projects.update_one(
-        {"project_id": project_id},
-        {"$set": {"status": "videos_generated", "updated_at": datetime.now(timezone.utc).isoformat()}}
-    )
-    
-    return {"results": results}
+    return await run_idempotent(request, user, 202, queue)
 
 @api_router.post("/projects/{project_id}/scenes/approve")
 async def approve_scenes(project_id: str, request: SceneApprovalRequest, user: User = Depends(get_current_user)):
@@ -1019,25 +3210,307 @@ async def approve_scenes(project_id: str, request: SceneApprovalRequest, user: U
         {"project_id": project_id, "scene_id": {"$in": request.scene_ids}},
         {"$set": {field: request.approved}}
     )
+    for scene_id in request.scene_ids:
+        emit_db_event(project_id, {"type": "scene", "scene_id": scene_id, "changes": {field: request.approved}})
     
     # Update project status based on approvals
     if request.approval_type == "image" and request.approved:
-        await db.projects.update_one(
-            {"project_id": project_id},
-            {"$set": {"status": "images_approved", "updated_at": datetime.now(timezone.utc).isoformat()}}
-        )
+        await set_project_status(project_id, "images_approved")
     elif request.approval_type == "video" and request.approved:
-        await db.projects.update_one(
-            {"project_id": project_id},
-            {"$set": {"status": "videos_approved", "updated_at": datetime.now(timezone.utc).isoformat()}}
-        )
+        await set_project_status(project_id, "videos_approved")
     
     return {"message": f"Updated {len(request.scene_ids)} scenes", "approved": request.approved}
 
+# ==================== MEDIA POOL ====================
+#
+# Every ffmpeg run goes through media_pool, which caps concurrent processes at
+# MEDIA_POOL_SLOTS (each limited to FFMPEG_THREADS threads) so simultaneous
+# assemblies share the cores instead of oversubscribing them. Excess runs wait
+# in priority order; cancelling the awaiting task kills the subprocess.
+
+# Lower runs first
+MEDIA_PRIORITY_ASSEMBLY = 0
+MEDIA_PRIORITY_NORMALIZE = 5
+MEDIA_PRIORITY_BACKGROUND = 10
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+class MediaPool:
+    def __init__(self, slots: int, max_queue: int):
+        self.slots = slots
+        self.max_queue = max_queue
+        self._running: Dict[str, Dict[str, Any]] = {}
+        # (priority, sequence, waiter, project id)
+        self._waiting: List[Tuple[int, int, asyncio.Future, Optional[str]]] = []
+        self._seq = 0
+
+    def _release(self):
+        while self._waiting:
+            _, _, waiter, _ = heapq.heappop(self._waiting)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.slots += 1
+
+    async def _acquire(self, priority: int, project_id: Optional[str]):
+        if self.slots > 0 and not self._waiting:
+            self.slots -= 1
+            return
+        if len(self._waiting) >= self.max_queue:
+            raise HTTPException(status_code=503, detail="Media processing is busy, please retry shortly")
+        waiter = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._waiting, (priority, self._seq, waiter, project_id))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as we were cancelled; pass it on
+                self._release()
+            else:
+                self._waiting = [item for item in self._waiting if item[2] is not waiter]
+                heapq.heapify(self._waiting)
+            raise
+
+    async def run(self, args: List[str], priority: int = MEDIA_PRIORITY_BACKGROUND, label: str = "ffmpeg",
+                  duration: Optional[float] = None, on_progress: Optional[ProgressCallback] = None,
+                  project_id: Optional[str] = None) -> Tuple[int, str]:
+        """Run an ffmpeg command in a pool slot, returning (exit code, stderr).
+
+        args start with "ffmpeg" and end with the single output path; -progress
+        is added up front and -threads as an output option, so it limits the
+        encoder rather than the input decoder.
+        With a duration (seconds of output expected), progress reports carry
+        a 0-1 fraction. project_id scopes the run in stats().
+        """
+        await self._acquire(priority, project_id)
+        run_id = uuid.uuid4().hex[:8]
+        entry = {"label": label, "project_id": project_id, "priority": priority,
+                 "started_at": datetime.now(timezone.utc).isoformat(),
+                 "out_time": 0.0, "fraction": None, "speed": None}
+        self._running[run_id] = entry
+        proc = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                args[0], "-progress", "pipe:1", "-nostats", *args[1:-1], "-threads", str(FFMPEG_THREADS), args[-1],
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            stderr_task = asyncio.create_task(proc.stderr.read())
+            fields: Dict[str, str] = {}
+            async for raw_line in proc.stdout:
+                key, _, value = raw_line.decode(errors="replace").strip().partition("=")
+                fields[key] = value
+                if key != "progress":
+                    continue
+                # One -progress block ends with progress=continue|end
+                out_time_us = fields.get("out_time_us") or fields.get("out_time_ms")
+                if out_time_us and out_time_us.lstrip("-").isdigit():
+                    entry["out_time"] = max(0.0, int(out_time_us) / 1_000_000)
+                if duration:
+                    entry["fraction"] = 1.0 if value == "end" else min(1.0, entry["out_time"] / duration)
+                entry["speed"] = fields.get("speed")
+                if on_progress:
+                    on_progress({"out_time": entry["out_time"], "fraction": entry["fraction"], "speed": entry["speed"]})
+            stderr = await stderr_task
+            await proc.wait()
+            return proc.returncode, stderr.decode(errors="replace")
+        except asyncio.CancelledError:
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        finally:
+            del self._running[run_id]
+            self._release()
+
+    def stats(self, project_ids: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Pool usage; with project_ids, running and queued work is limited to those projects"""
+        def visible(project_id: Optional[str]) -> bool:
+            return project_ids is None or project_id in project_ids
+
+        queued = [item for item in self._waiting if not item[2].done() and visible(item[3])]
+        return {
+            "free_slots": self.slots,
+            "running": [entry for entry in self._running.values() if visible(entry["project_id"])],
+            "queue_depth": len(queued),
+            "queued_by_priority": {
+                str(priority): sum(1 for item in queued if item[0] == priority)
+                for priority in sorted({item[0] for item in queued})
+            }
+        }
+
+media_pool = MediaPool(MEDIA_POOL_SLOTS, MEDIA_POOL_MAX_QUEUE)
+
+async def gather_or_cancel(*aws: Awaitable[Any]) -> List[Any]:
+    """asyncio.gather that cancels the remaining awaitables as soon as one raises.
+
+    Used for batches of media_pool runs, so a full queue (503) or a failed
+    run doesn't leave its siblings holding slots for a result nobody awaits.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+@api_router.get("/media/pool")
+async def get_media_pool_stats(user: User = Depends(get_current_user)):
+    """Free slots, plus the caller's running ffmpeg processes and queue depth, for this process"""
+    project_ids = await db.projects.distinct("project_id", {"user_id": user.user_id})
+    return media_pool.stats(set(project_ids))
+
 # ==================== FINAL VIDEO ASSEMBLY ====================
 
+# Re-encode settings used when clips can't be stream-copied; part of the assembly manifest
+ASSEMBLY_ENCODE_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "23", "-c:a", "aac", "-b:a", "128k"]
+
+# Per-clip normalization encode; part of the normalized clip cache key
+NORMALIZE_VIDEO_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "23"]
+
+# Assemblies running in this process, so concurrent requests share one ffmpeg run
+_assembly_tasks: Dict[str, asyncio.Task] = {}
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def clip_digest(project_dir: Path, scene: Dict[str, Any]) -> str:
+    """Content hash of a scene's clip, computed once and kept on the scene"""
+    if scene.get("video_digest"):
+        return scene["video_digest"]
+    digest = await asyncio.to_thread(file_digest, project_dir / f"{scene['scene_id']}.mp4")
+    await db.scenes.update_one({"scene_id": scene["scene_id"]}, {"$set": {"video_digest": digest}})
+    return digest
+
+async def probe_clip(path: Path) -> Optional[Dict[str, Any]]:
+    """Codec, resolution, frame rate, timebase, audio layout and duration of a clip via ffprobe; None if it can't be probed"""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-print_format", "json", "-show_streams", "-show_format", str(path),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
+        logger.warning("ffprobe not found; clip metadata unavailable")
+        return None
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        logger.error(f"ffprobe error for {path}: {stderr.decode()}")
+        return None
+    
+    info = json.loads(stdout)
+    video = next((st for st in info.get("streams", []) if st.get("codec_type") == "video"), None)
+    audio = next((st for st in info.get("streams", []) if st.get("codec_type") == "audio"), None)
+    if video is None:
+        return None
+    return {
+        "video_codec": video.get("codec_name"),
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "pix_fmt": video.get("pix_fmt"),
+        "fps": video.get("r_frame_rate"),
+        "time_base": video.get("time_base"),
+        "audio_codec": audio.get("codec_name") if audio else None,
+        "sample_rate": int(audio["sample_rate"]) if audio and audio.get("sample_rate") else None,
+        "channels": audio.get("channels") if audio else None,
+        "duration": float(info.get("format", {}).get("duration") or 0)
+    }
+
+async def clip_meta(project_dir: Path, scene: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """ffprobe metadata for a scene's clip, probed once and kept on the scene"""
+    if scene.get("video_meta"):
+        return scene["video_meta"]
+    meta = await probe_clip(project_dir / f"{scene['scene_id']}.mp4")
+    if meta:
+        await db.scenes.update_one({"scene_id": scene["scene_id"]}, {"$set": {"video_meta": meta}})
+    return meta
+
+# Clip properties that must match for the concat demuxer to stream-copy
+CONCAT_SPEC_FIELDS = ("video_codec", "width", "height", "pix_fmt", "fps", "time_base",
+                      "audio_codec", "sample_rate", "channels")
+
+def concat_spec(meta: Dict[str, Any]) -> Tuple:
+    return tuple(meta.get(field) for field in CONCAT_SPEC_FIELDS)
+
+def normalize_args(source: Path, target: Dict[str, Any], source_meta: Dict[str, Any], output: Path) -> List[str]:
+    """ffmpeg arguments that re-encode one clip to the target's concat spec"""
+    width, height = target["width"], target["height"]
+    args = ["ffmpeg", "-y", "-i", str(source)]
+    add_silence = target["audio_codec"] and not source_meta.get("audio_codec")
+    if add_silence:
+        layout = "mono" if target["channels"] == 1 else "stereo"
+        args += ["-f", "lavfi", "-i", f"anullsrc=channel_layout={layout}:sample_rate={target['sample_rate']}"]
+    args += [
+        "-vf", (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+                f"fps={target['fps']},format={target['pix_fmt']}"),
+        *NORMALIZE_VIDEO_ARGS,
+        "-video_track_timescale", target["time_base"].split("/")[-1],
+    ]
+    if target["audio_codec"]:
+        args += ["-c:a", "aac", "-ar", str(target["sample_rate"]), "-ac", str(target["channels"])]
+        if add_silence:
+            args += ["-map", "0:v:0", "-map", "1:a:0", "-shortest"]
+    else:
+        args += ["-an"]
+    return args + [str(output)]
+
+async def normalize_clip(source: Path, digest: str, meta: Dict[str, Any], target: Dict[str, Any],
+                         project_id: Optional[str] = None) -> Optional[Path]:
+    """Re-encode a clip to the target concat spec, reusing an earlier result for the same clip and spec.
+
+    Returns None if ffmpeg fails.
+    """
+    key_source = json.dumps({"clip": digest, "target": target, "encode": NORMALIZE_VIDEO_ARGS}, sort_keys=True)
+    output = NORMALIZED_DIR / f"{hashlib.sha256(key_source.encode('utf-8')).hexdigest()}.mp4"
+    if output.exists():
+        # mtime doubles as last use for prune_normalized_clips
+        output.touch()
+        return output
+    
+    tmp = output.with_name(f"{output.stem}.{uuid.uuid4().hex[:8]}.tmp.mp4")
+    try:
+        returncode, stderr = await media_pool.run(
+            normalize_args(source, target, meta, tmp),
+            priority=MEDIA_PRIORITY_NORMALIZE,
+            label=f"normalize {source.name}",
+            duration=meta.get("duration"),
+            project_id=project_id
+        )
+        if returncode != 0:
+            logger.error(f"ffmpeg normalize error for {source}: {stderr}")
+            return None
+        os.replace(tmp, output)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return output
+
+def prune_normalized_clips():
+    """Delete least recently used normalized clips beyond NORMALIZED_CACHE_MAX_BYTES"""
+    files = sorted(
+        ((path.stat(), path) for path in NORMALIZED_DIR.glob("*.mp4") if not path.name.endswith(".tmp.mp4")),
+        key=lambda item: item[0].st_mtime,
+        reverse=True
+    )
+    total = 0
+    for stat, path in files:
+        total += stat.st_size
+        if total > NORMALIZED_CACHE_MAX_BYTES:
+            path.unlink(missing_ok=True)
+
+def assembly_manifest_hash(clips: List[Tuple[str, str]]) -> str:
+    """Hash of the ordered (scene_id, clip digest) list and the encode settings"""
+    manifest = json.dumps({"clips": clips, "encode": ASSEMBLY_ENCODE_ARGS, "normalize": NORMALIZE_VIDEO_ARGS})
+    return hashlib.sha256(manifest.encode("utf-8")).hexdigest()
+
 @api_router.post("/projects/{project_id}/assemble")
-async def assemble_final_video(project_id: str, user: User = Depends(get_current_user)):
+async def assemble_final_video(project_id: str, request: Request, user: User = Depends(get_current_user)):
     """Assemble all APPROVED scene videos into final video using ffmpeg"""
     project = await db.projects.find_one(
         {"project_id": project_id, "user_id": user.user_id},
@@ -1046,9 +3519,49 @@ async def assemble_final_video(project_id: str, user: User = Depends(get_current
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
+    async def assemble():
+        task = _assembly_tasks.get(project_id)
+        if task is None:
+            task = asyncio.create_task(_assemble_final_video(project_id))
+            _assembly_tasks[project_id] = task
+            task.add_done_callback(lambda _: _assembly_tasks.pop(project_id, None))
+        # Shielded so one client disconnecting doesn't cancel the others' assembly
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # DELETE /assemble cancelled the assembly itself rather than this request
+            if task.cancelled():
+                raise HTTPException(status_code=409, detail="Assembly cancelled")
+            raise
+        if STREAM_PACKAGING_AFTER_ASSEMBLY:
+            job = await enqueue_job("package_stream", user.user_id, project_id,
+                                    payload={"name": "final"}, coalesce=True)
+            result = {**result, "packaging_job_id": job["job_id"]}
+        return result
+    
+    return await run_idempotent(request, user, 200, assemble)
+
+@api_router.delete("/projects/{project_id}/assemble")
+async def cancel_assembly(project_id: str, user: User = Depends(get_current_user)):
+    """Cancel an in-progress assembly in this process, killing its ffmpeg runs"""
+    project = await db.projects.find_one(
+        {"project_id": project_id, "user_id": user.user_id},
+        {"_id": 0, "project_id": 1}
+    )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    task = _assembly_tasks.get(project_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="No assembly in progress")
+    task.cancel()
+    project_events.publish(project_id, {"type": "assembly", "stage": "cancelled"})
+    return {"message": "Assembly cancelled"}
+
+async def _assemble_final_video(project_id: str) -> Dict[str, Any]:
     scenes = await db.scenes.find(
         {"project_id": project_id, "video_status": "completed", "video_approved": True},
-        {"_id": 0}
+        {"_id": 0, "scene_id": 1, "scene_number": 1, "video_digest": 1, "video_meta": 1}
     ).sort("scene_number", 1).to_list(100)
     
     if not scenes:
@@ -1057,59 +3570,123 @@ async def assemble_final_video(project_id: str, user: User = Depends(get_current
     project_dir = VIDEOS_DIR / project_id
     project_dir.mkdir(exist_ok=True)
     
-    # Build ffmpeg concat file
-    list_path = project_dir / "filelist.txt"
-    valid_scenes = []
-    with open(list_path, "w") as f:
-        for scene in scenes:
-            video_path = project_dir / f"{scene['scene_id']}.mp4"
-            if video_path.exists():
-                f.write(f"file '{video_path}'\n")
-                valid_scenes.append(scene)
+    valid_scenes = [scene for scene in scenes if (project_dir / f"{scene['scene_id']}.mp4").exists()]
     
     if not valid_scenes:
         raise HTTPException(status_code=400, detail="No video files found on disk for approved scenes.")
     
-    output_path = project_dir / "final.mp4"
-    
-    # Run ffmpeg to concatenate
-    proc = await asyncio.create_subprocess_exec(
-        "ffmpeg", "-y", "-f", "concat", "-safe", "0",
-        "-i", str(list_path), "-c", "copy", str(output_path),
-        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-    )
-    stdout, stderr = await proc.communicate()
-    
-    if proc.returncode != 0:
-        logger.error(f"ffmpeg merge error: {stderr.decode()}")
-        # Try re-encoding if concat copy fails
-        proc2 = await asyncio.create_subprocess_exec(
-            "ffmpeg", "-y", "-f", "concat", "-safe", "0",
-            "-i", str(list_path),
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-            "-c:a", "aac", "-b:a", "128k",
-            str(output_path),
-            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        stdout2, stderr2 = await proc2.communicate()
-        if proc2.returncode != 0:
-            logger.error(f"ffmpeg re-encode error: {stderr2.decode()}")
-            raise HTTPException(status_code=500, detail="Failed to merge videos")
-    
-    await db.projects.update_one(
-        {"project_id": project_id},
-        {"$set": {
-            "status": "completed",
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
-    return {
+    final_path = project_dir / "final.mp4"
+    manifest_path = project_dir / "final.mp4.manifest"
+    digests = [await clip_digest(project_dir, scene) for scene in valid_scenes]
+    manifest_hash = assembly_manifest_hash([(scene["scene_id"], digest) for scene, digest in zip(valid_scenes, digests)])
+    result = {
         "success": True,
         "project_id": project_id,
         "scenes_count": len(valid_scenes),
         "download_url": f"/api/projects/{project_id}/final-video"
     }
+    
+    # Same clips in the same order as the existing output: nothing to do
+    if final_path.exists() and manifest_path.exists() and manifest_path.read_text().strip() == manifest_hash:
+        logger.info(f"Final video for project {project_id} is up to date")
+        project_events.publish(project_id, {"type": "assembly", "stage": "completed", "download_url": result["download_url"]})
+        await set_project_status(project_id, "completed")
+        return {**result, "cached": True}
+    
+    # Decide up front whether the clips can be stream-copied. Clips whose
+    # codec/resolution/frame rate/timebase/audio differ from the majority are
+    # re-encoded to match it, in parallel. If the majority is in codecs we
+    # don't encode (anything but H.264/AAC), every clip is normalized to the
+    # majority's geometry in H.264/AAC instead. Without metadata (ffprobe
+    # unavailable) a stream copy is simply attempted.
+    metas = [await clip_meta(project_dir, scene) for scene in valid_scenes]
+    specs = [concat_spec(meta) for meta in metas if meta]
+    target = None
+    if specs and len(specs) == len(metas) and len(set(specs)) > 1:
+        target = dict(zip(CONCAT_SPEC_FIELDS, max(set(specs), key=specs.count)))
+        if target["video_codec"] != "h264" or target["audio_codec"] not in (None, "aac"):
+            target.update(video_codec="h264", audio_codec="aac" if target["audio_codec"] else None)
+    
+    clip_paths = [project_dir / f"{scene['scene_id']}.mp4" for scene in valid_scenes]
+    copy = True
+    if target is not None:
+        mismatched = [i for i, meta in enumerate(metas) if concat_spec(meta) != concat_spec(target)]
+        project_events.publish(project_id, {"type": "assembly", "stage": "normalizing", "clips": len(mismatched)})
+        normalized = await gather_or_cancel(*(
+            normalize_clip(clip_paths[i], digests[i], metas[i], target, project_id) for i in mismatched
+        ))
+        if all(normalized):
+            for i, path in zip(mismatched, normalized):
+                clip_paths[i] = path
+        else:
+            copy = False
+        await asyncio.to_thread(prune_normalized_clips)
+    
+    # Per-run file names; the result is moved into place atomically, so an
+    # assembly in another process never sees or leaves a half-written final.mp4
+    run_id = uuid.uuid4().hex[:8]
+    list_path = project_dir / f"filelist.{run_id}.txt"
+    output_path = project_dir / f"final.{run_id}.tmp.mp4"
+    
+    try:
+        with open(list_path, "w") as f:
+            for clip_path in (clip_paths if copy else
+                              [project_dir / f"{scene['scene_id']}.mp4" for scene in valid_scenes]):
+                f.write(f"file '{clip_path}'\n")
+        
+        # Assembly runs in this request, so its progress is published straight to this process's bus
+        total_duration = sum(meta["duration"] for meta in metas if meta) or None
+        
+        def report(stage: str) -> ProgressCallback:
+            return lambda progress: project_events.publish(project_id, {"type": "assembly", "stage": stage, **progress})
+        
+        returncode = None
+        if copy:
+            project_events.publish(project_id, {"type": "assembly", "stage": "concatenating", "scenes": len(valid_scenes)})
+            returncode, stderr = await media_pool.run(
+                ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(list_path), "-c", "copy", str(output_path)],
+                priority=MEDIA_PRIORITY_ASSEMBLY,
+                label=f"concat {project_id}",
+                duration=total_duration,
+                on_progress=report("concatenating"),
+                project_id=project_id
+            )
+            if returncode != 0:
+                logger.error(f"ffmpeg merge error: {stderr}")
+        
+        if returncode != 0:
+            project_events.publish(project_id, {"type": "assembly", "stage": "re-encoding", "scenes": len(valid_scenes)})
+            returncode, stderr = await media_pool.run(
+                ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(list_path), *ASSEMBLY_ENCODE_ARGS, str(output_path)],
+                priority=MEDIA_PRIORITY_ASSEMBLY,
+                label=f"re-encode {project_id}",
+                duration=total_duration,
+                on_progress=report("re-encoding"),
+                project_id=project_id
+            )
+            if returncode != 0:
+                logger.error(f"ffmpeg re-encode error: {stderr}")
+                project_events.publish(project_id, {"type": "assembly", "stage": "failed"})
+                raise HTTPException(status_code=500, detail="Failed to merge videos")
+        
+        # Drop the old manifest first so it can never describe the new file
+        manifest_path.unlink(missing_ok=True)
+        os.replace(output_path, final_path)
+        manifest_tmp = project_dir / f"final.{run_id}.manifest.tmp"
+        manifest_tmp.write_text(manifest_hash)
+        os.replace(manifest_tmp, manifest_path)
+    finally:
+        list_path.unlink(missing_ok=True)
+        output_path.unlink(missing_ok=True)
+    
+    project_events.publish(project_id, {
+        "type": "assembly",
+        "stage": "completed",
+        "download_url": f"/api/projects/{project_id}/final-video"
+    })
+    await set_project_status(project_id, "completed")
+    
+    return {**result, "cached": False}
 
 @api_router.get("/projects/{project_id}/final-video")
 async def get_final_video(project_id: str, user: User = Depends(get_current_user)):
@@ -1130,16 +3707,25 @@ async def get_project_status(project_id: str, user: User = Depends(get_current_u
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    scenes = await db.scenes.find(
-        {"project_id": project_id},
-        {"_id": 0}
-    ).sort("scene_number", 1).to_list(100)
+    # Count in the database so the payload is one small document regardless of scene count
+    counts = await db.scenes.aggregate([
+        {"$match": {"project_id": project_id}},
+        {"$group": {
+            "_id": None,
+            "total_scenes": {"$sum": 1},
+            "images_generated": {"$sum": {"$cond": [{"$eq": ["$image_generated", True]}, 1, 0]}},
+            "images_approved": {"$sum": {"$cond": [{"$eq": ["$image_approved", True]}, 1, 0]}},
+            "videos_completed": {"$sum": {"$cond": [{"$eq": ["$video_status", "completed"]}, 1, 0]}},
+            "videos_approved": {"$sum": {"$cond": [{"$eq": ["$video_approved", True]}, 1, 0]}}
+        }}
+    ]).to_list(1)
+    counts = counts[0] if counts else {}
     
-    total_scenes = len(scenes)
-    images_generated = sum(1 for s in scenes if s.get("image_generated"))
-    images_approved = sum(1 for s in scenes if s.get("image_approved"))
-    videos_completed = sum(1 for s in scenes if s.get("video_status") == "completed")
-    videos_approved = sum(1 for s in scenes if s.get("video_approved"))
+    total_scenes = counts.get("total_scenes", 0)
+    images_generated = counts.get("images_generated", 0)
+    images_approved = counts.get("images_approved", 0)
+    videos_completed = counts.get("videos_completed", 0)
+    videos_approved = counts.get("videos_approved", 0)
     
     return {
         "project": project,
@@ -1156,6 +3742,209 @@ async def get_project_status(project_id: str, user: User = Depends(get_current_u
         }
     }
 
+# ==================== STREAM PACKAGING ====================
+#
+# Assembled and scene videos can be packaged as HLS (and optionally DASH)
+# with a bitrate ladder so players start quickly and seek without
+# downloading the whole MP4. Packaging runs as a background job through the
+# media pool; output lives under videos/<project>/streams/<name>/<version>/,
+# where name is "final" or a scene id and version is a prefix of the source
+# file's SHA-256, so every served file is immutable.
+
+# (height, video bitrate) rungs; only those no taller than the source are produced
+STREAM_LADDER = [(1080, 5000), (720, 2800), (480, 1400), (360, 800)]
+
+STREAM_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".mpd": "application/dash+xml",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+}
+
+def stream_source(project_id: str, name: str) -> Path:
+    return VIDEOS_DIR / project_id / ("final.mp4" if name == "final" else f"{name}.mp4")
+
+def stream_url(project_id: str, name: str, version: str, filename: str) -> str:
+    return f"/api/projects/{project_id}/streams/{name}/{version}/{filename}"
+
+def hls_rendition_args(source: Path, height: int, kbps: int, has_audio: bool, out_dir: Path) -> List[str]:
+    args = [
+        "ffmpeg", "-y", "-i", str(source),
+        "-vf", f"scale=-2:{height}",
+        "-c:v", "libx264", "-preset", "fast",
+        "-b:v", f"{kbps}k", "-maxrate", f"{int(kbps * 1.07)}k", "-bufsize", f"{int(kbps * 1.5)}k",
+        # Keyframes on segment boundaries so every rendition switches cleanly
+        "-force_key_frames", f"expr:gte(t,n_forced*{STREAM_SEGMENT_SECONDS})", "-sc_threshold", "0",
+    ]
+    args += ["-c:a", "aac", "-b:a", "128k", "-ac", "2"] if has_audio else ["-an"]
+    return args + [
+        "-f", "hls", "-hls_time", str(STREAM_SEGMENT_SECONDS), "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", str(out_dir / "seg_%05d.m4s"),
+        str(out_dir / "index.m3u8")
+    ]
+
+def dash_args(source: Path, rungs: List[Tuple[int, int]], has_audio: bool, out_dir: Path) -> List[str]:
+    args = ["ffmpeg", "-y", "-i", str(source)]
+    for _ in rungs:
+        args += ["-map", "0:v:0"]
+    if has_audio:
+        args += ["-map", "0:a:0", "-c:a", "aac", "-b:a", "128k", "-ac", "2"]
+    args += ["-c:v", "libx264", "-preset", "fast",
+             "-force_key_frames", f"expr:gte(t,n_forced*{STREAM_SEGMENT_SECONDS})", "-sc_threshold", "0"]
+    for i, (height, kbps) in enumerate(rungs):
+        args += [f"-filter:v:{i}", f"scale=-2:{height}", f"-b:v:{i}", f"{kbps}k"]
+    adaptation_sets = "id=0,streams=v id=1,streams=a" if has_audio else "id=0,streams=v"
+    return args + [
+        "-f", "dash", "-seg_duration", str(STREAM_SEGMENT_SECONDS),
+        "-use_template", "1", "-use_timeline", "1",
+        "-init_seg_name", "dash_init_$RepresentationID$.m4s",
+        "-media_seg_name", "dash_$RepresentationID$_$Number%05d$.m4s",
+        "-adaptation_sets", adaptation_sets,
+        str(out_dir / "manifest.mpd")
+    ]
+
+async def package_stream(project_id: str, name: str) -> Dict[str, Any]:
+    """Package a project's final video ("final") or a scene clip (scene id) as HLS/DASH; returns its stream info"""
+    source = stream_source(project_id, name)
+    if not source.exists():
+        raise HTTPException(status_code=404, detail="Video not generated yet")
+    
+    version = (await asyncio.to_thread(file_digest, source))[:16]
+    streams_dir = VIDEOS_DIR / project_id / "streams" / name
+    out_dir = streams_dir / version
+    info = {
+        "version": version,
+        "hls_url": stream_url(project_id, name, version, "master.m3u8"),
+        "dash_url": stream_url(project_id, name, version, "manifest.mpd") if STREAM_DASH else None
+    }
+    
+    if not out_dir.exists():
+        meta = await probe_clip(source)
+        if meta is None:
+            raise HTTPException(status_code=500, detail="Could not read video metadata")
+        rungs = [(h, kbps) for h, kbps in STREAM_LADDER if h <= meta["height"]] or [STREAM_LADDER[-1]]
+        has_audio = bool(meta["audio_codec"])
+        
+        # Built in a scratch directory and renamed into place, so a version directory is always complete
+        tmp_dir = streams_dir / f".{version}.{uuid.uuid4().hex[:8]}.tmp"
+        tmp_dir.mkdir(parents=True)
+        try:
+            runs = []
+            for height, kbps in rungs:
+                (tmp_dir / f"{height}p").mkdir()
+                runs.append(media_pool.run(
+                    hls_rendition_args(source, height, kbps, has_audio, tmp_dir / f"{height}p"),
+                    priority=MEDIA_PRIORITY_BACKGROUND,
+                    label=f"hls {height}p {project_id}/{name}",
+                    duration=meta["duration"] or None,
+                    project_id=project_id
+                ))
+            if STREAM_DASH:
+                runs.append(media_pool.run(
+                    dash_args(source, rungs, has_audio, tmp_dir),
+                    priority=MEDIA_PRIORITY_BACKGROUND,
+                    label=f"dash {project_id}/{name}",
+                    duration=meta["duration"] or None,
+                    project_id=project_id
+                ))
+            for returncode, stderr in await gather_or_cancel(*runs):
+                if returncode != 0:
+                    logger.error(f"ffmpeg packaging error for {project_id}/{name}: {stderr}")
+                    raise HTTPException(status_code=500, detail="Failed to package video stream")
+            
+            master = ["#EXTM3U", "#EXT-X-VERSION:7", "#EXT-X-INDEPENDENT-SEGMENTS"]
+            for height, kbps in rungs:
+                width = round(height * meta["width"] / meta["height"] / 2) * 2
+                bandwidth = (kbps + (128 if has_audio else 0)) * 1000
+                master += [f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{height}", f"{height}p/index.m3u8"]
+            (tmp_dir / "master.m3u8").write_text("\n".join(master) + "\n")
+            
+            try:
+                os.rename(tmp_dir, out_dir)
+            except OSError:
+                # Another worker finished the same version first
+                if not out_dir.exists():
+                    raise
+        finally:
+            if tmp_dir.exists():
+                await asyncio.to_thread(shutil.rmtree, tmp_dir, True)
+    
+    # Older versions of this video are no longer referenced
+    for old_dir in streams_dir.iterdir():
+        if old_dir.name != version and not old_dir.name.startswith("."):
+            await asyncio.to_thread(shutil.rmtree, old_dir, True)
+    
+    if name == "final":
+        await db.projects.update_one(
+            {"project_id": project_id},
+            {"$set": {"final_stream": info, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        emit_db_event(project_id, {"type": "stream", "name": name, **info})
+    else:
+        await set_scene_fields(project_id, name, {"video_stream": info})
+    return info
+
+@job_handler("package_stream")
+async def run_package_stream_job(job: Dict[str, Any], user: User) -> Dict[str, Any]:
+    return await package_stream(job["project_id"], job["payload"]["name"])
+
+@api_router.post("/projects/{project_id}/package", status_code=202)
+async def package_project_stream(project_id: str, request: Request, scene_id: Optional[str] = None,
+                                 user: User = Depends(get_current_user)):
+    """Queue HLS/DASH packaging of the final video, or of one scene's clip with scene_id"""
+    project = await db.projects.find_one(
+        {"project_id": project_id, "user_id": user.user_id},
+        {"_id": 0, "project_id": 1}
+    )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if scene_id is not None:
+        scene = await db.scenes.find_one(
+            {"scene_id": scene_id, "project_id": project_id},
+            {"_id": 0, "scene_id": 1}
+        )
+        if not scene:
+            raise HTTPException(status_code=404, detail="Scene not found")
+    
+    name = scene_id or "final"
+    if not stream_source(project_id, name).exists():
+        raise HTTPException(status_code=404, detail="Video not generated yet")
+    
+    async def queue():
+        job = await enqueue_job("package_stream", user.user_id, project_id, scene_id=scene_id,
+                                payload={"name": name}, coalesce=True)
+        return job_response(job)
+    
+    return await run_idempotent(request, user, 202, queue)
+
+@api_router.get("/projects/{project_id}/streams/{name}/{version}/{filename:path}")
+async def get_stream_file(project_id: str, name: str, version: str, filename: str,
+                          user: User = Depends(get_current_user)):
+    """Serve an HLS/DASH playlist, manifest or segment"""
+    project = await db.projects.find_one(
+        {"project_id": project_id, "user_id": user.user_id},
+        {"_id": 0, "project_id": 1}
+    )
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    version_dir = (VIDEOS_DIR / project_id / "streams" / name / version).resolve()
+    path = (version_dir / filename).resolve()
+    media_type = STREAM_MEDIA_TYPES.get(path.suffix)
+    if (name.startswith(".") or version.startswith(".") or version_dir not in path.parents
+            or media_type is None or not path.is_file()):
+        raise HTTPException(status_code=404, detail="Stream file not found")
+    return FileResponse(str(path), media_type=media_type, headers={"Cache-Control": STREAM_CACHE_CONTROL})
+
+# ==================== PROVIDER HEALTH ====================
+
+@api_router.get("/providers/health")
+async def get_provider_health(user: User = Depends(get_current_user)):
+    """Circuit breaker states and call/retry/trip counters for each provider in this process"""
+    return {name: breaker.snapshot() for name, breaker in circuit_breakers.items()}
+
 # ==================== ROOT ROUTE ====================
 
 @api_router.get("/")
@@ -1174,6 +3963,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_job_worker_stop: Optional[asyncio.Event] = None
+_job_worker_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_job_workers():
+    global _job_worker_stop
+    _job_worker_stop = asyncio.Event()
+    for i in range(JOB_WORKERS_IN_PROCESS):
+        _job_worker_tasks.append(asyncio.create_task(job_worker_loop(new_worker_id(i), _job_worker_stop)))
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    if _job_worker_stop is not None:
+        _job_worker_stop.set()
+    # Jobs interrupted here keep their lease until it expires, then get re-claimed
+    for task in _job_worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_job_worker_tasks, return_exceptions=True)
+    _job_worker_tasks.clear()
+
+@app.on_event("startup")
+async def start_migrations():
+    async def run():
+        try:
+            await run_migrations()
+        except Exception as e:
+            logger.error(f"Startup migrations failed: {e}")
+    asyncio.create_task(run())
+
+_session_watch_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_session_cache_listener():
+    global _session_watch_task
+    if SESSION_CACHE_CHANGE_STREAM:
+        _session_watch_task = asyncio.create_task(watch_session_invalidations())
+
+@app.on_event("shutdown")
+async def stop_session_cache_listener():
+    if _session_watch_task is not None:
+        _session_watch_task.cancel()
+
+_project_events_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_project_event_listener():
+    global _project_events_task
+    if PROJECT_EVENTS_CHANGE_STREAM:
+        _project_events_task = asyncio.create_task(watch_project_events())
+
+@app.on_event("shutdown")
+async def stop_project_event_listener():
+    if _project_events_task is not None:
+        _project_events_task.cancel()
+
+@app.on_event("startup")
+async def open_http_pool():
+    # Create the per-host clients up front so the first requests don't pay for it
+    for url in (GEMINI_API_BASE, AUTH_SESSION_URL):
+        http_pool.get(url)
+
+@app.on_event("shutdown")
+async def close_http_pool():
+    await http_pool.aclose()
+
+@app.on_event("shutdown")
+async def shutdown_veo_executor():
+    if _veo_executor is not None:
+        _veo_executor.shutdown(wait=False, cancel_futures=True)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
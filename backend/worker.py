@@ -0,0 +1,38 @@
+"""Standalone job worker.
+
+Drains the same `jobs` collection as the in-process workers started by the API
+server. Run from the backend directory:
+
+    python -m worker --concurrency 4
+
+Set JOB_WORKERS_IN_PROCESS=0 on the API server to leave all generation work
+to dedicated worker processes.
+"""
+import argparse
+import asyncio
+import signal
+
+from server import client, http_pool, job_worker_loop, logger, new_worker_id
+
+
+async def main(concurrency: int):
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    logger.info(f"Starting {concurrency} job worker(s)")
+    try:
+        await asyncio.gather(*(
+            job_worker_loop(new_worker_id(i), stop_event) for i in range(concurrency)
+        ))
+    finally:
+        await http_pool.aclose()
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background generation job workers")
+    parser.add_argument("--concurrency", type=int, default=2, help="number of jobs to run concurrently")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
@@ -15,6 +15,7 @@ class ScriptifyAPITester:
         self.user_id = None
         self.project_id = None
         self.scene_ids = []
+        self.job_id = None
         self.tests_run = 0
         self.tests_passed = 0
         self.failed_tests = []
@@ -291,14 +292,24 @@ FADE OUT."""
             return False
             
         scene_id = self.scene_ids[0]
-        return self.run_test("Generate single image", "POST", f"projects/{self.project_id}/scenes/{scene_id}/generate-image", 200)
+        success, response = self.run_test("Generate single image", "POST", f"projects/{self.project_id}/scenes/{scene_id}/generate-image", 202)
+        if success and response.get("job_id"):
+            self.job_id = response["job_id"]
+        return success, response
+
+    def test_get_job(self):
+        """Test polling a queued generation job"""
+        if not self.job_id:
+            self.log("❌ No job ID available for testing", "ERROR")
+            return False
+        return self.run_test("Get job status", "GET", f"jobs/{self.job_id}", 200)
 
     def test_generate_all_images(self):
         """Test generating images for all scenes"""
         if not self.project_id:
             self.log("❌ No project ID available for testing", "ERROR")
             return False
-        return self.run_test("Generate all images", "POST", f"projects/{self.project_id}/generate-all-images", 200)
+        return self.run_test("Generate all images", "POST", f"projects/{self.project_id}/generate-all-images", 202)
 
     def test_approve_images(self):
         """Test bulk image approval"""
@@ -318,7 +329,7 @@ FADE OUT."""
         if not self.project_id:
             self.log("❌ No project ID available for testing", "ERROR")
             return False
-        return self.run_test("Generate videos for approved", "POST", f"projects/{self.project_id}/generate-all-videos", 200)
+        return self.run_test("Generate videos for approved", "POST", f"projects/{self.project_id}/generate-all-videos", 202)
 
     def test_approve_videos(self):
         """Test bulk video approval"""
@@ -362,6 +373,7 @@ FADE OUT."""
             self.test_get_scenes,
             self.test_get_characters,
             self.test_generate_single_image,
+            self.test_get_job,
             self.test_generate_all_images,
             self.test_approve_images,
             self.test_generate_videos_for_approved,
@@ -31,6 +31,10 @@ export default function ProjectEditor({ user }) {
   const [script, setScript] = useState("");
   const [hasApiKey, setHasApiKey] = useState(false);
   const [autoSaveTimeout, setAutoSaveTimeout] = useState(null);
+  // Scenes and characters as the decomposition stream delivers them, before they are saved
+  const [streamedScenes, setStreamedScenes] = useState([]);
+  const [streamedCharacters, setStreamedCharacters] = useState([]);
+  const [streamFailed, setStreamFailed] = useState(false);
 
   useEffect(() => {
     fetchProject();
@@ -132,6 +136,9 @@ export default function ProjectEditor({ user }) {
     }
 
     setDecomposing(true);
+    setStreamedScenes([]);
+    setStreamedCharacters([]);
+    setStreamFailed(false);
     try {
       // First save the script
       await authFetch(`${API}/projects/${projectId}`, {
@@ -140,18 +147,58 @@ export default function ProjectEditor({ user }) {
         body: JSON.stringify({ script }),
       });
 
-      // Then decompose
-      const response = await authFetch(`${API}/projects/${projectId}/decompose`, {
+      // Then decompose, showing scenes as the server streams them in. Incremental mode
+      // keeps the scenes (and their images, videos and approvals) of unchanged script parts.
+      const response = await authFetch(`${API}/projects/${projectId}/decompose/stream?mode=incremental`, {
         method: "POST",
       });
 
-      if (response.ok) {
-        const data = await response.json();
-        toast.success(`Created ${data.scenes?.length || 0} scenes!`);
-        navigate(`/project/${projectId}/scenes`);
-      } else {
+      if (!response.ok) {
         const error = await response.json();
         toast.error(error.detail || "Failed to decompose script");
+        return;
+      }
+
+      const toastId = toast.loading("Breaking script into scenes...");
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let sceneCount = 0;
+      let completed = false;
+      let failure = null;
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.type === "scene") {
+            sceneCount += 1;
+            setStreamedScenes((prev) => [...prev, event.scene]);
+            toast.loading(`Parsed ${sceneCount} scene${sceneCount === 1 ? "" : "s"}...`, { id: toastId });
+          } else if (event.type === "character") {
+            setStreamedCharacters((prev) => [...prev, event.character]);
+          } else if (event.type === "done") {
+            // Scenes are only saved once the whole breakdown has arrived
+            completed = true;
+            sceneCount = event.scenes.length;
+            setStreamedScenes(event.scenes);
+            setStreamedCharacters(event.characters);
+          } else if (event.type === "error") {
+            failure = event.detail;
+          }
+        }
+      }
+
+      if (failure || !completed) {
+        setStreamFailed(true);
+        toast.error(failure || "Failed to decompose script", { id: toastId });
+      } else {
+        toast.success(`Created ${sceneCount} scenes!`, { id: toastId });
+        navigate(`/project/${projectId}/scenes`);
       }
     } catch (error) {
       console.error("Error decomposing script:", error);
@@ -342,6 +389,63 @@ The barista winks and walks away. Sarah turns back to her laptop, determination
 
           {/* Tips Sidebar */}
           <div className="space-y-6">
+            {(decomposing || streamedScenes.length > 0) && (
+              <Card data-testid="streamed-scenes">
+                <CardContent className="p-6 space-y-4">
+                  <div className="flex items-center justify-between">
+                    <h3 className="font-semibold" style={{ fontFamily: 'Manrope, sans-serif' }}>
+                      Scenes
+                    </h3>
+                    <span className="text-xs text-muted-foreground">
+                      {decomposing ? (
+                        <span className="flex items-center gap-1">
+                          <Loader2 className="w-3 h-3 animate-spin" />
+                          {streamedScenes.length} so far
+                        </span>
+                      ) : streamFailed ? (
+                        "Not saved"
+                      ) : (
+                        `${streamedScenes.length} scenes`
+                      )}
+                    </span>
+                  </div>
+
+                  {streamFailed && (
+                    <p className="text-xs text-amber-700">
+                      The breakdown didn't finish, so your existing scenes were kept.
+                    </p>
+                  )}
+
+                  <ol className="space-y-3 max-h-[420px] overflow-y-auto pr-1">
+                    {streamedScenes.map((scene) => (
+                      <li key={scene.scene_id} className="text-sm border-l-2 border-primary/40 pl-3">
+                        <div className="font-medium">
+                          Scene {scene.scene_number}
+                          {scene.setting && (
+                            <span className="font-normal text-muted-foreground"> · {scene.setting}</span>
+                          )}
+                        </div>
+                        <p className="text-muted-foreground line-clamp-2">{scene.description}</p>
+                      </li>
+                    ))}
+                  </ol>
+
+                  {streamedCharacters.length > 0 && (
+                    <div className="flex flex-wrap gap-2">
+                      {streamedCharacters.map((character) => (
+                        <span
+                          key={character.character_id}
+                          className="text-xs px-2 py-1 rounded-full bg-primary/10 text-primary"
+                        >
+                          {character.name}
+                        </span>
+                      ))}
+                    </div>
+                  )}
+                </CardContent>
+              </Card>
+            )}
+
             <Card>
               <CardContent className="p-6 space-y-4">
                 <div className="flex items-center gap-3">
@@ -47,6 +47,7 @@ import {
 import { toast } from "sonner";
 import { API } from "@/App";
 import { downloadBlob } from "@/utils/videoUtils";
+import { assetUrl, subscribeProjectEvents, waitForJob } from "@/utils/api";
 
 // Step definitions
 const STEPS = [
@@ -106,6 +107,19 @@ export default function SceneManager({ user }) {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [projectId]);
 
+  // Apply pushed state changes instead of re-fetching the project and its scenes
+  useEffect(() => {
+    return subscribeProjectEvents(projectId, (event) => {
+      if (event.type === "scene") {
+        setScenes((prev) =>
+          prev.map((s) => (s.scene_id === event.scene_id ? { ...s, ...event.changes } : s))
+        );
+      } else if (event.type === "project") {
+        setProject((prev) => (prev ? { ...prev, status: event.status } : prev));
+      }
+    });
+  }, [projectId]);
+
   const fetchData = async () => {
     try {
       const [projectRes, scenesRes, charactersRes] = await Promise.all([
@@ -138,22 +152,28 @@ export default function SceneManager({ user }) {
   };
 
   // ============== IMAGE GENERATION ==============
-  const generateImage = async (sceneId) => {
+  // force skips the server's prompt cache so an unchanged scene still gets a fresh image
+  const generateImage = async (sceneId, { force = false } = {}) => {
     setGeneratingImages((prev) => ({ ...prev, [sceneId]: true }));
     toast.info("Generating HD image... This may take 10-15 seconds");
     
     try {
       const response = await fetch(
-        `${API}/projects/${projectId}/scenes/${sceneId}/generate-image`,
+        `${API}/projects/${projectId}/scenes/${sceneId}/generate-image${force ? "?force=true" : ""}`,
         { method: "POST", credentials: "include" }
       );
 
       if (response.ok) {
-        const data = await response.json();
+        const job = await waitForJob((await response.json()).job_id);
+        if (job.status !== "completed") {
+          toast.error(job.error || "Failed to generate image");
+          return;
+        }
+        const data = job.result;
         setScenes((prev) =>
           prev.map((s) =>
             s.scene_id === sceneId
-              ? { ...s, image_generated: true, image_data: data.image_data, image_approved: false }
+              ? { ...s, image_generated: true, image_url: data.image_url, image_approved: false }
               : s
           )
         );
@@ -170,6 +190,44 @@ export default function SceneManager({ user }) {
     }
   };
 
+  // Queue one bulk job for every scene still missing its asset; the server generates them concurrently
+  const runBulkGeneration = async (endpoint, total, label, waitOptions = {}) => {
+    const response = await fetch(`${API}/projects/${projectId}/${endpoint}?missing_only=true`, {
+      method: "POST",
+      credentials: "include",
+    });
+    if (!response.ok) {
+      const error = await response.json();
+      toast.error(error.detail || `Failed to generate ${label}s`);
+      return null;
+    }
+
+    const job = await waitForJob((await response.json()).job_id, {
+      ...waitOptions,
+      onProgress: ({ progress = {} }) => {
+        const done = progress.completed || 0;
+        const count = progress.total || total;
+        setGenerationProgress({
+          current: done,
+          total: count,
+          status: `Generated ${done} of ${count} ${label}s${progress.failed ? ` (${progress.failed} failed)` : ""}...`,
+        });
+      },
+    });
+    if (job.status !== "completed") {
+      toast.error(job.error || `Failed to generate ${label}s`);
+      return null;
+    }
+
+    const sceneNumbers = Object.fromEntries(scenes.map((s) => [s.scene_id, s.scene_number]));
+    job.result.results
+      .filter((r) => !r.success)
+      .forEach((r) => toast.error(`Scene ${sceneNumbers[r.scene_id] ?? "?"}: ${r.error || "Failed"}`));
+    // Pick up every scene's new asset even if some project events were missed
+    await fetchData();
+    return job.result.results;
+  };
+
   const generateAllImages = async () => {
     const scenesToGenerate = scenes.filter(s => !s.image_generated);
     if (scenesToGenerate.length === 0) {
@@ -180,41 +238,18 @@ export default function SceneManager({ user }) {
     setGeneratingAllImages(true);
     setGenerationProgress({ current: 0, total: scenesToGenerate.length, status: "Starting image generation..." });
 
-    for (let i = 0; i < scenesToGenerate.length; i++) {
-      const scene = scenesToGenerate[i];
-      setGenerationProgress({ 
-        current: i, 
-        total: scenesToGenerate.length, 
-        status: `Generating image ${i + 1} of ${scenesToGenerate.length} (Scene ${scene.scene_number})...` 
-      });
-
-      try {
-        const response = await fetch(
-          `${API}/projects/${projectId}/scenes/${scene.scene_id}/generate-image`,
-          { method: "POST", credentials: "include" }
-        );
-
-        if (response.ok) {
-          const data = await response.json();
-          setScenes((prev) =>
-            prev.map((s) =>
-              s.scene_id === scene.scene_id
-                ? { ...s, image_generated: true, image_data: data.image_data, image_approved: false }
-                : s
-            )
-          );
-        } else {
-          const error = await response.json();
-          toast.error(`Scene ${scene.scene_number}: ${error.detail || "Failed"}`);
-        }
-      } catch (error) {
-        toast.error(`Scene ${scene.scene_number}: Generation failed`);
+    try {
+      const results = await runBulkGeneration("generate-all-images", scenesToGenerate.length, "image");
+      if (results) {
+        setGenerationProgress({ current: results.length, total: results.length, status: "Complete!" });
+        toast.success("All images generated! Please review and approve.");
       }
+    } catch (error) {
+      console.error("Error generating images:", error);
+      toast.error("Image generation failed");
+    } finally {
+      setGeneratingAllImages(false);
     }
-
-    setGenerationProgress({ current: scenesToGenerate.length, total: scenesToGenerate.length, status: "Complete!" });
-    setGeneratingAllImages(false);
-    toast.success("All images generated! Please review and approve.");
   };
 
   // ============== VIDEO GENERATION ==============
@@ -229,10 +264,16 @@ export default function SceneManager({ user }) {
       );
 
       if (response.ok) {
+        const job = await waitForJob((await response.json()).job_id, { interval: 5000 });
+        if (job.status !== "completed") {
+          toast.error(job.error || "Failed to generate video");
+          return;
+        }
+
         // Also create the actual video file from the image
         const sceneData = scenes.find(s => s.scene_id === sceneId);
-        if (sceneData?.image_data) {
-          createSceneVideo(sceneId, sceneData.image_data);
+        if (sceneData?.image_url) {
+          createSceneVideo(sceneId, assetUrl(sceneData.image_url));
         }
         
         setScenes((prev) =>
@@ -304,9 +345,9 @@ export default function SceneManager({ user }) {
     }
     
     // Fallback: Create video from image using browser APIs
-    if (!sceneVideoUrls[scene.scene_id] && scene.image_data) {
+    if (!sceneVideoUrls[scene.scene_id] && scene.image_url) {
       toast.info("Creating video preview... Please wait (10 seconds)");
-      const result = await createSceneVideoFromImage(scene.scene_id, scene.image_data);
+      const result = await createSceneVideoFromImage(scene.scene_id, assetUrl(scene.image_url));
       if (result) {
         setSceneVideoUrls(prev => ({ ...prev, [scene.scene_id]: result }));
       }
@@ -338,58 +379,21 @@ export default function SceneManager({ user }) {
     }
 
     setGeneratingAllVideos(true);
-    setGenerationProgress({ current: 0, total: approvedScenes.length, status: "Starting video generation with Veo..." });
-
-    for (let i = 0; i < approvedScenes.length; i++) {
-      const scene = approvedScenes[i];
-      setGenerationProgress({ 
-        current: i, 
-        total: approvedScenes.length, 
-        status: `Generating video ${i + 1} of ${approvedScenes.length} (Scene ${scene.scene_number})... This may take a few minutes.` 
-      });
-
-      try {
-        const response = await fetch(
-          `${API}/projects/${projectId}/scenes/${scene.scene_id}/generate-video`,
-          { method: "POST", credentials: "include" }
-        );
+    setGenerationProgress({ current: 0, total: approvedScenes.length, status: "Starting video generation with Veo... This may take a few minutes." });
 
-        if (response.ok) {
-          const data = await response.json();
-          
-          // If API returned video data, store it
-          if (data.video_data) {
-            const byteCharacters = atob(data.video_data);
-            const byteNumbers = new Array(byteCharacters.length);
-            for (let i = 0; i < byteCharacters.length; i++) {
-              byteNumbers[i] = byteCharacters.charCodeAt(i);
-            }
-            const byteArray = new Uint8Array(byteNumbers);
-            const blob = new Blob([byteArray], { type: 'video/mp4' });
-            const videoUrl = URL.createObjectURL(blob);
-            setSceneVideoUrls(prev => ({ ...prev, [scene.scene_id]: { url: videoUrl, blob: blob } }));
-          }
-          
-          setScenes((prev) =>
-            prev.map((s) =>
-              s.scene_id === scene.scene_id
-                ? { ...s, video_status: "completed", video_approved: false }
-                : s
-            )
-          );
-        } else {
-          const error = await response.json();
-          toast.error(`Scene ${scene.scene_number}: ${error.detail || "Failed"}`);
-        }
-      } catch (error) {
-        toast.error(`Scene ${scene.scene_number}: Video generation failed`);
+    try {
+      const results = await runBulkGeneration("generate-all-videos", approvedScenes.length, "video", { interval: 5000 });
+      if (results) {
+        setGenerationProgress({ current: results.length, total: results.length, status: "Complete!" });
+        setActiveTab("videos");
+        toast.success("All videos generated! Please review and approve.");
       }
+    } catch (error) {
+      console.error("Error generating videos:", error);
+      toast.error("Video generation failed");
+    } finally {
+      setGeneratingAllVideos(false);
     }
-
-    setGenerationProgress({ current: approvedScenes.length, total: approvedScenes.length, status: "Complete!" });
-    setGeneratingAllVideos(false);
-    setActiveTab("videos");
-    toast.success("All videos generated! Please review and approve.");
   };
 
   // ============== APPROVAL ==============
@@ -926,9 +930,9 @@ export default function SceneManager({ user }) {
                                 <Loader2 className="w-8 h-8 animate-spin text-white mb-2" />
                                 <p className="text-white text-sm">Generating HD Image...</p>
                               </div>
-                            ) : scene.image_data ? (
+                            ) : scene.image_url ? (
                               <img
-                                src={`data:image/png;base64,${scene.image_data}`}
+                                src={assetUrl(scene.image_url)}
                                 alt={`Scene ${scene.scene_number}`}
                                 className="w-full h-full object-cover cursor-pointer"
                                 onClick={() => setSelectedScene(scene)}
@@ -967,13 +971,13 @@ export default function SceneManager({ user }) {
                           <CardContent className="p-3">
                             <p className="text-sm text-muted-foreground line-clamp-2 mb-2">{scene.description}</p>
                             <div className="flex items-center gap-1 flex-wrap">
-                              <Button size="sm" variant="ghost" onClick={() => generateImage(scene.scene_id)} disabled={generatingImages[scene.scene_id]}>
+                              <Button size="sm" variant="ghost" onClick={() => generateImage(scene.scene_id, { force: !!scene.image_generated })} disabled={generatingImages[scene.scene_id]}>
                                 {generatingImages[scene.scene_id] ? <Loader2 className="w-3 h-3 animate-spin" /> : <RefreshCw className="w-3 h-3" />}
                               </Button>
                               <Button size="sm" variant="ghost" onClick={() => { setEditingScene(scene); setEditSceneDialog(true); }}>
                                 <Edit3 className="w-3 h-3" />
                               </Button>
-                              {scene.image_data && (
+                              {scene.image_url && (
                                 <Button size="sm" variant="ghost" onClick={() => setSelectedScene(scene)}>
                                   <Eye className="w-3 h-3" />
                                 </Button>
@@ -1054,8 +1058,8 @@ export default function SceneManager({ user }) {
                               onClick={() => prepareVideoPreview(scene)}
                               data-testid={`video-preview-${scene.scene_id}`}
                             >
-                              {scene.image_data && (
-                                <img src={`data:image/png;base64,${scene.image_data}`} alt="" className="w-full h-full object-cover opacity-80 group-hover:opacity-60 transition-opacity" />
+                              {scene.image_url && (
+                                <img src={assetUrl(scene.image_url)} alt="" className="w-full h-full object-cover opacity-80 group-hover:opacity-60 transition-opacity" />
                               )}
                               <div className="absolute inset-0 flex items-center justify-center">
                                 <div className="w-14 h-14 rounded-full bg-white/90 flex items-center justify-center group-hover:scale-110 transition-transform shadow-lg">
@@ -1205,11 +1209,11 @@ export default function SceneManager({ user }) {
             <DialogTitle>Scene {selectedScene?.scene_number} - HD Preview</DialogTitle>
             <DialogDescription>{selectedScene?.description}</DialogDescription>
           </DialogHeader>
-          {selectedScene?.image_data && (
-            <img src={`data:image/png;base64,${selectedScene.image_data}`} alt="" className="w-full rounded-lg" />
+          {selectedScene?.image_url && (
+            <img src={assetUrl(selectedScene.image_url)} alt="" className="w-full rounded-lg" />
           )}
           <DialogFooter>
-            <Button variant="outline" onClick={() => { generateImage(selectedScene.scene_id); setSelectedScene(null); }}>
+            <Button variant="outline" onClick={() => { generateImage(selectedScene.scene_id, { force: true }); setSelectedScene(null); }}>
               <RefreshCw className="w-4 h-4 mr-2" /> Regenerate
             </Button>
             {!selectedScene?.image_approved && (
@@ -1338,7 +1342,7 @@ export default function SceneManager({ user }) {
               >
                 Your browser does not support video playback.
               </video>
-            ) : videoPreviewScene?.image_data ? (
+            ) : videoPreviewScene?.image_url ? (
               <div className="aspect-video flex items-center justify-center">
                 <div className="text-center text-white">
                   <Loader2 className="w-12 h-12 mx-auto mb-3 animate-spin" />
@@ -1,6 +1,9 @@
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 export const API = `${BACKEND_URL}/api`;
 
+// Backend-relative asset paths (e.g. scene image_url) to absolute URLs
+export const assetUrl = (path) => (path ? `${BACKEND_URL}${path}` : null);
+
 export const getToken = () => localStorage.getItem('session_token');
 export const setToken = (token) => localStorage.setItem('session_token', token);
 export const clearToken = () => localStorage.removeItem('session_token');
@@ -31,3 +34,60 @@ export const downloadBlob = (blob, filename) => {
     URL.revokeObjectURL(url);
   }, 100);
 };
+
+// Wake-up callbacks for waitForJob, keyed by job_id, fired by project job events
+const jobListeners = new Map();
+let openEventStreams = 0;
+
+// Server-sent scene/job/project/assembly/stream events for a project; returns a function that closes the stream.
+export const subscribeProjectEvents = (projectId, onEvent) => {
+  const source = new EventSource(`${API}/projects/${projectId}/events`, { withCredentials: true });
+  openEventStreams += 1;
+  const handle = (message) => {
+    const event = JSON.parse(message.data);
+    if (event.type === "job") {
+      (jobListeners.get(event.job_id) || new Set()).forEach((listener) => listener(event));
+    }
+    if (onEvent) onEvent(event);
+  };
+  ["scene", "job", "project", "assembly", "stream"].forEach((type) => source.addEventListener(type, handle));
+  return () => {
+    source.close();
+    openEventStreams -= 1;
+  };
+};
+
+// Generation endpoints queue a background job; wait until it finishes. While a
+// project event stream is open, job events trigger the re-check and polling is
+// only a slow fallback.
+export const waitForJob = async (jobId, { interval = 2000, onProgress } = {}) => {
+  for (;;) {
+    let wake;
+    const woken = new Promise((resolve) => {
+      const listeners = jobListeners.get(jobId) || new Set();
+      jobListeners.set(jobId, listeners);
+      const pollInterval = openEventStreams > 0 ? Math.max(interval, 15000) : interval;
+      const timer = setTimeout(() => wake(), pollInterval);
+      wake = () => {
+        clearTimeout(timer);
+        listeners.delete(wake);
+        if (listeners.size === 0) jobListeners.delete(jobId);
+        resolve();
+      };
+      listeners.add(wake);
+    });
+
+    const response = await authFetch(`${API}/jobs/${jobId}`);
+    if (!response.ok) {
+      wake();
+      throw new Error("Failed to fetch job status");
+    }
+    const job = await response.json();
+    if (onProgress) onProgress(job);
+    if (job.status === "completed" || job.status === "failed") {
+      wake();
+      return job;
+    }
+    await woken;
+  }
+};
@@ -2,7 +2,7 @@
 
 /**
  * Creates a video blob from a base64 image with Ken Burns effect
- * @param {string} imageBase64 - Base64 encoded image data
+ * @param {string} imageBase64 - Base64 encoded image data, data URI or image URL
  * @param {number} duration - Duration in seconds (default 10)
  * @returns {Promise<Blob>} - Video blob
  */
@@ -135,6 +135,10 @@ export async function createVideoFromImage(imageBase64, duration = 10) {
     // Handle both with and without data URI prefix
     if (imageBase64.startsWith('data:')) {
       img.src = imageBase64;
+    } else if (/^(https?:)?\//.test(imageBase64)) {
+      // Served image URL; credentials keep the canvas untainted
+      img.crossOrigin = 'use-credentials';
+      img.src = imageBase64;
     } else {
       img.src = `data:image/png;base64,${imageBase64}`;
     }
@@ -241,6 +245,10 @@ export async function createVideoFromImageSimple(imageBase64, duration = 10) {
     
     if (imageBase64.startsWith('data:')) {
       img.src = imageBase64;
+    } else if (/^(https?:)?\//.test(imageBase64)) {
+      // Served image URL; credentials keep the canvas untainted
+      img.crossOrigin = 'use-credentials';
+      img.src = imageBase64;
     } else {
       img.src = `data:image/png;base64,${imageBase64}`;
     }
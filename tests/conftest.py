@@ -0,0 +1,41 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from pymongo import ReturnDocument
+
+# server.py reads these at import time; the motor client connects lazily, so no database is needed
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """Point server.db at an in-memory MongoDB (writes run without transactions)"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import mongomock.collection
+    import server
+
+    # pymongo 4.11+ passes sort= to bulk update builders, which mongomock doesn't accept yet
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+    monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, "add_update",
+                        lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs))
+
+    # find_one_and_update(return_document=AFTER) re-reads by the original filter unless the projection keeps _id
+    find_one_and_update = mongomock.collection.Collection.find_one_and_update
+
+    def find_one_and_update_by_id(self, filter, update, projection=None, **kwargs):
+        if projection is None or kwargs.get("return_document") is not ReturnDocument.AFTER:
+            return find_one_and_update(self, filter, update, projection, **kwargs)
+        doc = find_one_and_update(self, filter, update, **kwargs)
+        return doc and self.find_one({"_id": doc["_id"]}, projection)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find_one_and_update", find_one_and_update_by_id)
+
+    database = mongomock_motor.AsyncMongoMockClient()["test_database"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "_transactions_supported", False)
+    return database
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def project(monkeypatch, mock_db, tmp_path):
+    monkeypatch.setattr(server, "VIDEOS_DIR", tmp_path)
+    (tmp_path / "proj").mkdir()
+    scenes = [{"scene_id": f"s{i}", "project_id": "proj", "scene_number": i, "video_status": "completed",
+               "video_approved": True, "video_digest": f"digest{i}"} for i in (1, 2)]
+    asyncio.run(mock_db.scenes.insert_many(scenes))
+    for scene in scenes:
+        (tmp_path / "proj" / f"{scene['scene_id']}.mp4").write_bytes(b"clip")
+
+    async def no_meta(project_dir, scene):
+        return None
+
+    monkeypatch.setattr(server, "clip_meta", no_meta)
+    return tmp_path / "proj"
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    runs = []
+
+    async def run(args, **kwargs):
+        runs.append(args)
+        with open(args[-1], "wb") as f:
+            f.write(b"final")
+        return 0, ""
+
+    monkeypatch.setattr(server.media_pool, "run", run)
+    return runs
+
+
+def assemble():
+    return asyncio.run(server._assemble_final_video("proj"))
+
+
+def test_unchanged_clips_reuse_the_final_video(project, ffmpeg):
+    assert assemble()["cached"] is False
+    assert len(ffmpeg) == 1
+    assert (project / "final.mp4").read_bytes() == b"final"
+
+    assert assemble()["cached"] is True
+    assert len(ffmpeg) == 1
+
+
+@pytest.mark.parametrize("change", [
+    {"scene_id": "s2", "video_digest": "regenerated"},
+    {"scene_id": "s2", "scene_number": 0},
+])
+def test_changed_or_reordered_clips_reassemble(mock_db, project, ffmpeg, change):
+    assemble()
+    scene_id = change.pop("scene_id")
+    asyncio.run(mock_db.scenes.update_one({"scene_id": scene_id}, {"$set": change}))
+    assert assemble()["cached"] is False
+    assert len(ffmpeg) == 2
+
+
+def test_manifest_covers_encode_settings(monkeypatch):
+    clips = [("s1", "digest1"), ("s2", "digest2")]
+    before = server.assembly_manifest_hash(clips)
+    assert server.assembly_manifest_hash(clips[::-1]) != before
+    monkeypatch.setattr(server, "ASSEMBLY_ENCODE_ARGS", ["-c:v", "libx265"])
+    assert server.assembly_manifest_hash(clips) != before
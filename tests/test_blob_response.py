@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import server
+from server import BlobStore, HTTPException, blob_response, parse_byte_range
+
+DATA = bytes(range(100))
+
+
+def test_parse_byte_range():
+    assert parse_byte_range("bytes=0-9", 100) == (0, 9)
+    assert parse_byte_range("bytes=90-", 100) == (90, 99)
+    assert parse_byte_range("bytes=-10", 100) == (90, 99)
+    assert parse_byte_range("bytes=95-200", 100) == (95, 99)
+    # Multiple ranges and other units fall back to the full body
+    assert parse_byte_range("bytes=0-1,5-6", 100) is None
+    assert parse_byte_range("items=0-1", 100) is None
+    assert parse_byte_range("bytes=a-b", 100) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=50-10"])
+def test_unsatisfiable_range_is_416(header):
+    with pytest.raises(HTTPException) as excinfo:
+        parse_byte_range(header, 100)
+    assert excinfo.value.status_code == 416
+    assert excinfo.value.headers["Content-Range"] == "bytes */100"
+
+
+@pytest.fixture
+def digest(monkeypatch, mock_db, tmp_path):
+    monkeypatch.setattr(server, "blob_store", BlobStore(tmp_path))
+    return asyncio.run(server.blob_store.put(DATA, "image/png"))
+
+
+def serve(digest, **headers):
+    scope = {"type": "http", "method": "GET", "path": "/",
+             "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]}
+    return asyncio.run(blob_response(Request(scope), digest, "image/png", "private, max-age=60"))
+
+
+def test_range_request_returns_206(digest):
+    resp = serve(digest, range="bytes=10-19")
+    assert resp.status_code == 206
+    assert resp.body == DATA[10:20]
+    assert resp.headers["content-range"] == "bytes 10-19/100"
+    assert resp.headers["etag"] == f'"{digest}"'
+
+
+def test_matching_etag_returns_304(digest):
+    resp = serve(digest, if_none_match=f'"other", "{digest}"')
+    assert resp.status_code == 304
+    assert resp.body == b""
+
+
+def test_stale_if_range_returns_the_full_blob(digest):
+    resp = serve(digest, range="bytes=10-19", if_range='"stale"')
+    assert resp.status_code == 200
+    assert "content-range" not in resp.headers
+
+
+def test_range_past_the_end_is_416(digest):
+    with pytest.raises(HTTPException) as excinfo:
+        serve(digest, range="bytes=500-")
+    assert excinfo.value.status_code == 416
@@ -0,0 +1,147 @@
+import asyncio
+
+import httpx
+import pytest
+
+import server
+from server import CircuitBreaker, CircuitOpen, call_provider, classify_provider_error
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker("test")
+    monkeypatch.setitem(server.circuit_breakers, "test", breaker)
+    monkeypatch.setattr(server, "backoff_delay", lambda attempt: 0)
+    return breaker
+
+
+def trip(breaker):
+    for _ in range(server.CIRCUIT_FAILURE_THRESHOLD):
+        breaker.before_call()
+        breaker.record_failure("transient")
+
+
+def expire(breaker):
+    breaker.opened_at -= server.CIRCUIT_RESET_SECONDS + 1
+
+
+async def succeed():
+    return "ok"
+
+
+def test_opens_after_consecutive_transient_failures(breaker):
+    for _ in range(server.CIRCUIT_FAILURE_THRESHOLD - 1):
+        breaker.before_call()
+        breaker.record_failure("transient")
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.record_failure("transient")
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    assert breaker.metrics["trips"] == 1
+
+
+def test_permanent_failures_do_not_trip(breaker):
+    for _ in range(server.CIRCUIT_FAILURE_THRESHOLD * 2):
+        breaker.before_call()
+        breaker.record_failure("permanent")
+    assert breaker.state == "closed"
+
+
+def test_half_open_allows_a_single_probe(breaker):
+    trip(breaker)
+    expire(breaker)
+    assert breaker.before_call() is True
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_probe_success_closes(breaker):
+    trip(breaker)
+    expire(breaker)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_probe_failure_reopens(breaker):
+    trip(breaker)
+    expire(breaker)
+    breaker.before_call()
+    breaker.record_failure("transient")
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_cancelled_probe_releases_half_open_slot(breaker):
+    async def scenario():
+        trip(breaker)
+        expire(breaker)
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.Event().wait()
+
+        probe = asyncio.create_task(call_provider("test", hang))
+        await started.wait()
+        assert breaker.probe_in_flight
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert not breaker.probe_in_flight
+        assert await call_provider("test", succeed) == "ok"
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_transient_errors_are_retried(breaker):
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ConnectError("boom")
+        return "ok"
+
+    assert asyncio.run(call_provider("test", flaky)) == "ok"
+    assert len(calls) == 3
+    assert breaker.metrics["retries"] == 2
+
+
+def test_permanent_errors_are_not_retried(breaker):
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise ValueError("resource id 4291 not found")
+
+    with pytest.raises(ValueError):
+        asyncio.run(call_provider("test", broken))
+    assert len(calls) == 1
+
+
+def test_status_codes_must_be_whole_tokens():
+    assert classify_provider_error(ValueError("resource id 4291 not found")) == "permanent"
+    assert classify_provider_error(ValueError("job 5031 INTERNALS")) == "permanent"
+    assert classify_provider_error(ValueError("429 RESOURCE_EXHAUSTED")) == "rate_limited"
+    assert classify_provider_error(ValueError("503 UNAVAILABLE")) == "transient"
+    assert classify_provider_error(ValueError("The model is overloaded")) == "transient"
+
+
+def test_non_idempotent_calls_are_not_retried_on_transient_errors(breaker):
+    calls = []
+
+    async def submit():
+        calls.append(1)
+        raise httpx.ReadTimeout("timed out")
+
+    with pytest.raises(server.ProviderUnavailable):
+        asyncio.run(call_provider("test", submit, retry_transient=False))
+    assert len(calls) == 1
+    assert breaker.metrics["errors"]["transient"] == 1
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+import server
+
+SCENES = [f"INT. ROOM {i} - DAY\nann waits in room {i}." for i in range(5)]
+
+
+class FakeGemini:
+    """Decomposes segmented text into one scene per [SEGMENT n] block (none for blocks containing EMPTY)"""
+
+    def __init__(self, monkeypatch, fail=False):
+        self.requests = []
+        self.fail = fail
+        monkeypatch.setattr(server, "stream_chunk_items", self.items)
+        monkeypatch.setattr(server, "decompose_text", self.decompose)
+
+    def result(self, text):
+        self.requests.append(text)
+        blocks = re.findall(r"\[SEGMENT (\d+)\]\n(.*?)(?=\n\n\[SEGMENT |\Z)", text, re.S)
+        scenes = [{"segment": int(n), "description": body.splitlines()[0], "characters": ["ann"]}
+                  for n, body in blocks if "EMPTY" not in body]
+        return {"scenes": scenes, "characters": [{"name": "Ann", "appearance": "tall"}]}
+
+    async def items(self, api_key, text, use_cache):
+        result = self.result(text)
+        for scene in result["scenes"]:
+            yield "scene", scene
+            if self.fail:
+                raise server.HTTPException(status_code=500, detail="Gemini returned an incomplete scene breakdown")
+        for char in result["characters"]:
+            yield "character", char
+
+    async def decompose(self, api_key, text, use_cache=True):
+        return self.result(text)
+
+
+def run(project_id, script, mode="full", stream=True):
+    async def collect():
+        return [event async for event in server.decompose_project(project_id, script, "key", mode=mode, stream=stream)]
+
+    return asyncio.run(collect())
+
+
+@pytest.fixture
+def project(mock_db):
+    asyncio.run(mock_db.projects.insert_one({"project_id": "proj", "user_id": "u", "title": "t", "script": ""}))
+    return "proj"
+
+
+def stored_scenes(db):
+    return asyncio.run(db.scenes.find({"project_id": "proj"}, {"_id": 0}).sort("scene_number", 1).to_list(None))
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_full_decomposition_tags_every_scene_with_its_segment(monkeypatch, mock_db, project, stream):
+    FakeGemini(monkeypatch)
+    events = run(project, "\n\n".join(SCENES), stream=stream)
+    assert [event["type"] for event in events] == ["scene"] * 5 + ["character", "done"]
+
+    scenes = stored_scenes(mock_db)
+    keys = server.segment_keys(server.split_script_segments("\n\n".join(SCENES)))
+    assert [scene["segment_key"] for scene in scenes] == keys
+    assert [scene["scene_number"] for scene in scenes] == [1, 2, 3, 4, 5]
+    # Scene character names follow the character's stored spelling
+    assert scenes[0]["characters"] == ["Ann"]
+    assert events[-1]["segments"] == {"total": 5, "changed": 5, "reused": 0}
+
+
+def test_incremental_keeps_unchanged_scenes_and_their_assets(monkeypatch, mock_db, project):
+    gemini = FakeGemini(monkeypatch)
+    run(project, "\n\n".join(SCENES))
+    before = stored_scenes(mock_db)
+    asyncio.run(mock_db.scenes.update_one({"scene_id": before[0]["scene_id"]}, {"$set": {"image_approved": True}}))
+
+    edited = list(SCENES)
+    edited[2] = edited[2] + " It rains."
+    edited.insert(4, "INT. NEW ROOM - NIGHT\nbo arrives.")
+    gemini.requests.clear()
+    events = run(project, "\n\n".join(edited), mode="incremental")
+
+    assert len(gemini.requests) == 1
+    assert "It rains." in gemini.requests[0] and "bo arrives." in gemini.requests[0]
+    assert "room 0" not in gemini.requests[0]
+    after = stored_scenes(mock_db)
+    assert [scene["scene_number"] for scene in after] == [1, 2, 3, 4, 5, 6]
+    kept = [before[i]["scene_id"] for i in (0, 1, 3, 4)]
+    assert [after[i]["scene_id"] for i in (0, 1, 3, 5)] == kept
+    assert after[0]["image_approved"] is True
+    assert before[2]["scene_id"] not in {scene["scene_id"] for scene in after}
+    assert events[-1]["segments"] == {"total": 6, "changed": 2, "reused": 4}
+    # The existing character is reused rather than duplicated
+    assert asyncio.run(mock_db.characters.count_documents({"project_id": "proj"})) == 1
+
+
+def test_segments_without_scenes_are_not_decomposed_again(monkeypatch, mock_db, project):
+    gemini = FakeGemini(monkeypatch)
+    script = "\n\n".join(SCENES[:2] + ["INT. EMPTY HALL\nNothing happens."])
+    run(project, script)
+    project_doc = asyncio.run(mock_db.projects.find_one({"project_id": "proj"}))
+    assert len(project_doc["empty_segment_keys"]) == 1
+
+    gemini.requests.clear()
+    events = run(project, script, mode="incremental")
+    assert gemini.requests == []
+    assert events[-1]["segments"]["reused"] == 3
+
+
+def test_failed_stream_leaves_the_breakdown_alone(monkeypatch, mock_db, project):
+    FakeGemini(monkeypatch)
+    run(project, "\n\n".join(SCENES))
+    before = stored_scenes(mock_db)
+
+    FakeGemini(monkeypatch, fail=True)
+
+    async def collect():
+        return [json.loads(line) async for line in server.stream_decomposition(
+            project, "\n\n".join(SCENES[1:]), "key", False, "full", False)]
+
+    events = asyncio.run(collect())
+    assert [event["type"] for event in events] == ["scene", "error"]
+    assert stored_scenes(mock_db) == before
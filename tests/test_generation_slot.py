@@ -0,0 +1,43 @@
+import asyncio
+
+import server
+
+
+def test_user_semaphores_are_dropped_once_idle(monkeypatch):
+    monkeypatch.setattr(server, "_generation_semaphore", None)
+    monkeypatch.setattr(server, "GENERATION_PER_USER_CONCURRENCY", 1)
+
+    async def scenario():
+        active = []
+        peak = []
+
+        async def work():
+            async with server.generation_slot("u1"):
+                active.append(1)
+                peak.append(len(active))
+                await asyncio.sleep(0)
+                active.pop()
+
+        await asyncio.gather(work(), work(), work())
+        assert max(peak) == 1
+
+        # A waiter cancelled while queued releases its reference too
+        holder_entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def holder():
+            async with server.generation_slot("u1"):
+                holder_entered.set()
+                await release.wait()
+
+        held = asyncio.create_task(holder())
+        await holder_entered.wait()
+        waiter = asyncio.create_task(work())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await asyncio.gather(held, waiter, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert server._user_generation_semaphores == {}
+    assert server._user_generation_refs == {}
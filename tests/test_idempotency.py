@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+import server
+from server import HTTPException, User, run_idempotent
+
+USER = User(user_id="u", email="u@example.com", name="U")
+
+
+@pytest.fixture
+def keys(mock_db):
+    asyncio.run(mock_db.idempotency_keys.create_index("scope", unique=True))
+    return mock_db.idempotency_keys
+
+
+def request(key, query=""):
+    return Request({"type": "http", "method": "POST", "path": "/api/projects/p/generate-all-images",
+                    "query_string": query.encode(), "headers": [(b"idempotency-key", key.encode())]})
+
+
+class Handler:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise HTTPException(status_code=500, detail="boom")
+        return {"job_id": f"job_{self.calls}"}
+
+
+def test_retry_with_the_same_key_replays_the_stored_response(keys):
+    handler = Handler()
+    first = asyncio.run(run_idempotent(request("k1"), USER, 202, handler))
+    replay = asyncio.run(run_idempotent(request("k1"), USER, 202, handler))
+    assert handler.calls == 1
+    assert first == {"job_id": "job_1"}
+    assert isinstance(replay, JSONResponse)
+    assert replay.status_code == 202
+    assert replay.body == b'{"job_id":"job_1"}'
+    assert replay.headers["idempotent-replayed"] == "true"
+
+
+def test_concurrent_duplicates_share_one_run(keys):
+    handler = Handler()
+
+    async def both():
+        return await asyncio.gather(run_idempotent(request("k1"), USER, 202, handler),
+                                    run_idempotent(request("k1"), USER, 202, handler))
+
+    assert asyncio.run(both()) == [{"job_id": "job_1"}] * 2
+    assert handler.calls == 1
+
+
+def test_key_reused_with_different_parameters_is_rejected(keys):
+    handler = Handler()
+    asyncio.run(run_idempotent(request("k1", "missing_only=true"), USER, 202, handler))
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(run_idempotent(request("k1", "missing_only=false"), USER, 202, handler))
+    assert excinfo.value.status_code == 422
+    assert excinfo.value.detail == server.IDEMPOTENCY_KEY_REUSED
+
+    async def concurrent():
+        return await asyncio.gather(run_idempotent(request("k2", "a=1"), USER, 202, handler),
+                                    run_idempotent(request("k2", "a=2"), USER, 202, handler),
+                                    return_exceptions=True)
+
+    first, second = asyncio.run(concurrent())
+    assert first == {"job_id": "job_2"}
+    assert isinstance(second, HTTPException) and second.status_code == 422
+
+
+def test_failed_request_releases_its_key(keys):
+    with pytest.raises(HTTPException):
+        asyncio.run(run_idempotent(request("k1"), USER, 202, Handler(fail=True)))
+    assert asyncio.run(keys.count_documents({})) == 0
+    handler = Handler()
+    assert asyncio.run(run_idempotent(request("k1"), USER, 202, handler)) == {"job_id": "job_1"}
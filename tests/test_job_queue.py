@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def user(mock_db):
+    asyncio.run(mock_db.users.insert_one({"user_id": "u", "email": "u@example.com", "name": "U"}))
+    return "u"
+
+
+@pytest.fixture
+def job(mock_db):
+    job = asyncio.run(server.enqueue_job("generate_image", "u", "proj", scene_id="s1"))
+    claimed = asyncio.run(server.claim_next_job("w1"))
+    assert claimed["job_id"] == job["job_id"]
+    return claimed
+
+
+def stored(db, job_id):
+    return asyncio.run(db.jobs.find_one({"job_id": job_id}, {"_id": 0}))
+
+
+def test_finished_at_is_set_only_on_terminal_states(mock_db, job):
+    asyncio.run(server._finish_job(job, "w1", {"status": "queued", "error": "boom"}))
+    assert "finished_at" not in stored(mock_db, job["job_id"])
+
+    asyncio.run(server._finish_job(job, "w1", {"status": "failed", "error": "boom"}))
+    doc = stored(mock_db, job["job_id"])
+    assert doc["finished_at"] == doc["updated_at"]
+
+
+def expire_lease(db, job_id):
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    asyncio.run(db.jobs.update_one({"job_id": job_id}, {"$set": {"lease_expires_at": past}}))
+
+
+def test_running_job_is_not_claimed_until_its_lease_expires(mock_db, job):
+    assert asyncio.run(server.claim_next_job("w2")) is None
+
+    expire_lease(mock_db, job["job_id"])
+    reclaimed = asyncio.run(server.claim_next_job("w2"))
+    assert reclaimed["job_id"] == job["job_id"]
+    assert reclaimed["worker_id"] == "w2"
+    assert reclaimed["attempts"] == 2
+
+    # The worker that lost the lease can no longer record an outcome
+    asyncio.run(server._finish_job(job, "w1", {"status": "completed"}))
+    assert stored(mock_db, job["job_id"])["status"] == "running"
+
+
+def test_heartbeat_extends_the_lease_until_it_is_lost(monkeypatch, mock_db, job):
+    monkeypatch.setattr(server, "JOB_HEARTBEAT_SECONDS", 0)
+    expire_lease(mock_db, job["job_id"])
+
+    async def beat_once():
+        heartbeat = asyncio.create_task(server._heartbeat_job(job["job_id"], "w1"))
+        await asyncio.sleep(0.01)
+        heartbeat.cancel()
+
+    asyncio.run(beat_once())
+    assert asyncio.run(server.claim_next_job("w2")) is None
+
+    # Once another worker holds the job, the old heartbeat stops by itself
+    expire_lease(mock_db, job["job_id"])
+    asyncio.run(server.claim_next_job("w2"))
+    asyncio.run(asyncio.wait_for(server._heartbeat_job(job["job_id"], "w1"), 1))
+    assert stored(mock_db, job["job_id"])["worker_id"] == "w2"
+
+
+def run_with(monkeypatch, job, handler):
+    monkeypatch.setitem(server.JOB_HANDLERS, job["type"], handler)
+    asyncio.run(server.run_job(job, "w1"))
+
+
+def test_retryable_failure_is_requeued_with_backoff(monkeypatch, mock_db, user, job):
+    async def flaky(job, user):
+        raise RuntimeError("connection reset")
+
+    run_with(monkeypatch, job, flaky)
+    doc = stored(mock_db, job["job_id"])
+    assert doc["status"] == "queued"
+    assert doc["error"] == "connection reset"
+    assert doc["run_after"] > datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=server.JOB_RETRY_DELAY_SECONDS - 5)
+    assert "finished_at" not in doc
+
+
+def test_last_attempt_and_client_errors_fail_the_job(monkeypatch, mock_db, user, job):
+    async def missing(job, user):
+        raise server.HTTPException(status_code=404, detail="Scene not found")
+
+    run_with(monkeypatch, job, missing)
+    doc = stored(mock_db, job["job_id"])
+    assert (doc["status"], doc["error"]) == ("failed", "Scene not found")
+
+    async def flaky(job, user):
+        raise RuntimeError("connection reset")
+
+    run_with(monkeypatch, {**job, "attempts": job["max_attempts"]}, flaky)
+    assert stored(mock_db, job["job_id"])["status"] == "failed"
+
+
+def test_provider_backoff_does_not_use_up_an_attempt(monkeypatch, mock_db, user, job):
+    async def limited(job, user):
+        raise server.ProviderRateLimited(20)
+
+    run_with(monkeypatch, job, limited)
+    doc = stored(mock_db, job["job_id"])
+    assert doc["status"] == "queued"
+    assert doc["attempts"] == job["attempts"] - 1
+
+
+def test_completed_job_records_its_result(monkeypatch, mock_db, user, job):
+    async def ok(job, user):
+        return {"image_url": "/img"}
+
+    run_with(monkeypatch, job, ok)
+    doc = stored(mock_db, job["job_id"])
+    assert (doc["status"], doc["result"], doc["lease_expires_at"]) == ("completed", {"image_url": "/img"}, None)
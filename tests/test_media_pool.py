@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+import server
+from server import MediaPool, gather_or_cancel
+
+
+def test_stats_only_show_the_callers_projects():
+    async def scenario():
+        pool = MediaPool(slots=0, max_queue=10)
+        mine = asyncio.create_task(pool._acquire(server.MEDIA_PRIORITY_NORMALIZE, "mine"))
+        theirs = asyncio.create_task(pool._acquire(server.MEDIA_PRIORITY_ASSEMBLY, "theirs"))
+        await asyncio.sleep(0)
+        pool._running["r1"] = {"label": "concat theirs", "project_id": "theirs"}
+        pool._running["r2"] = {"label": "concat mine", "project_id": "mine"}
+
+        stats = pool.stats({"mine"})
+        assert [entry["label"] for entry in stats["running"]] == ["concat mine"]
+        assert stats["queue_depth"] == 1
+        assert stats["queued_by_priority"] == {str(server.MEDIA_PRIORITY_NORMALIZE): 1}
+        assert pool.stats()["queue_depth"] == 2
+        mine.cancel()
+        theirs.cancel()
+        await asyncio.gather(mine, theirs, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_gather_or_cancel_cancels_siblings_on_failure():
+    async def scenario():
+        cancelled = []
+
+        async def slow(name):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(name)
+                raise
+
+        async def busy():
+            await asyncio.sleep(0)
+            raise server.HTTPException(status_code=503, detail="Media processing is busy, please retry shortly")
+
+        with pytest.raises(server.HTTPException):
+            await gather_or_cancel(slow("a"), busy(), slow("b"))
+        assert sorted(cancelled) == ["a", "b"]
+
+    asyncio.run(scenario())
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def scenario():
+        pool = MediaPool(slots=1, max_queue=10)
+        await pool._acquire(server.MEDIA_PRIORITY_BACKGROUND, None)
+        order = []
+
+        async def wait(name, priority):
+            await pool._acquire(priority, None)
+            order.append(name)
+            pool._release()
+
+        waiters = [asyncio.create_task(wait(name, priority)) for name, priority in [
+            ("background", server.MEDIA_PRIORITY_BACKGROUND),
+            ("normalize", server.MEDIA_PRIORITY_NORMALIZE),
+            ("assembly 1", server.MEDIA_PRIORITY_ASSEMBLY),
+            ("assembly 2", server.MEDIA_PRIORITY_ASSEMBLY),
+        ]]
+        await asyncio.sleep(0)
+        pool._release()
+        await asyncio.gather(*waiters)
+        assert order == ["assembly 1", "assembly 2", "normalize", "background"]
+        assert pool.slots == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        pool = MediaPool(slots=0, max_queue=1)
+        waiter = asyncio.create_task(pool._acquire(server.MEDIA_PRIORITY_BACKGROUND, None))
+        await asyncio.sleep(0)
+        with pytest.raises(server.HTTPException) as excinfo:
+            await pool._acquire(server.MEDIA_PRIORITY_ASSEMBLY, None)
+        assert excinfo.value.status_code == 503
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiters_leave_the_queue_and_keep_slots():
+    async def scenario():
+        pool = MediaPool(slots=1, max_queue=10)
+        await pool._acquire(server.MEDIA_PRIORITY_BACKGROUND, None)
+        queued = asyncio.create_task(pool._acquire(server.MEDIA_PRIORITY_ASSEMBLY, None))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert pool.stats()["queue_depth"] == 0
+
+        # Cancelled after being handed the slot: the slot goes back to the pool
+        handed = asyncio.create_task(pool._acquire(server.MEDIA_PRIORITY_ASSEMBLY, None))
+        await asyncio.sleep(0)
+        pool._release()
+        handed.cancel()
+        await asyncio.gather(handed, return_exceptions=True)
+        assert pool.slots == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+import server
+from server import ProviderRateLimited, ProviderRateLimiter
+
+
+def test_interactive_calls_get_a_429_instead_of_waiting(monkeypatch):
+    limiter = ProviderRateLimiter()
+    monkeypatch.setattr(server, "provider_limiter", limiter)
+    limiter.record_rate_limited("key", "model", 60)
+    calls = []
+
+    async def call():
+        calls.append(1)
+
+    with pytest.raises(ProviderRateLimited) as excinfo:
+        asyncio.run(server.call_provider("gemini", call, api_key="key", model="model",
+                                         max_wait=server.RATE_LIMIT_INTERACTIVE_MAX_WAIT_SECONDS))
+    assert calls == []
+    assert excinfo.value.status_code == 429
+    assert int(excinfo.value.headers["Retry-After"]) >= 59
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = server.TokenBucket(rpm=60)
+    for _ in range(bucket.capacity):
+        assert bucket.wait_time() == 0
+        bucket.take()
+    assert bucket.wait_time() == pytest.approx(1.0)
+    clock[0] += 1
+    assert bucket.wait_time() == 0
+
+
+def test_rate_limit_halves_the_rate_and_pauses(clock):
+    bucket = server.TokenBucket(rpm=60)
+    bucket.penalize(30)
+    assert bucket.rate == pytest.approx(bucket.base_rate / 2)
+    assert bucket.wait_time() == pytest.approx(30)
+    # Repeated 429s never take the rate below an eighth of the start
+    for _ in range(10):
+        bucket.penalize(0)
+    assert bucket.rate == pytest.approx(bucket.base_rate / 8)
+
+
+def test_successes_raise_the_rate_additively_up_to_the_cap():
+    bucket = server.TokenBucket(rpm=60)
+    bucket.penalize(0)
+    bucket.reward()
+    assert bucket.rate == pytest.approx(bucket.base_rate * 0.6)
+    for _ in range(100):
+        bucket.reward()
+    assert bucket.rate == pytest.approx(bucket.base_rate * server.RATE_LIMIT_MAX_BOOST)
+
+
+def test_buckets_are_per_key_and_model():
+    limiter = ProviderRateLimiter()
+    assert limiter.bucket("a", "m") is limiter.bucket("a", "m")
+    assert limiter.bucket("a", "m") is not limiter.bucket("b", "m")
+    assert limiter.bucket("a", "m") is not limiter.bucket("a", "n")
+    # Keys are only held as a hash
+    assert {key[0] for key in limiter._buckets}.isdisjoint({"a", "b"})
@@ -0,0 +1,18 @@
+from server import pack_segments, scene_segment, segmented_text
+
+
+def test_pack_segments_groups_indices_up_to_limit():
+    assert pack_segments(["aa", "bb", "cccccc", "d"], 5) == [[0, 1], [2], [3]]
+
+
+def test_segmented_text_numbers_each_segment():
+    assert segmented_text(["INT. A\nx", "INT. B\ny"]) == "[SEGMENT 1]\nINT. A\nx\n\n[SEGMENT 2]\nINT. B\ny"
+
+
+def test_scene_segment_maps_chunk_numbers_to_script_indices():
+    chunk = [4, 7, 9]
+    assert scene_segment({"segment": 2}, chunk, 4) == 7
+    assert scene_segment({"segment": "3"}, chunk, 4) == 9
+    # Missing or out of range numbers stay with the previous scene's segment
+    assert scene_segment({}, chunk, 7) == 7
+    assert scene_segment({"segment": 5}, chunk, 9) == 9
@@ -0,0 +1,47 @@
+import server
+from server import segment_keys, split_script_segments
+
+
+def paragraphs(count, size=250):
+    return [f"Paragraph {i}. " + ("word " * size)[: size - 14] for i in range(count)]
+
+
+def test_splits_at_scene_headings():
+    script = "Title page\n\nINT. HOUSE - DAY\nAnn enters.\n\nEXT. STREET - NIGHT\nBo waits.\n"
+    assert split_script_segments(script) == [
+        "Title page",
+        "INT. HOUSE - DAY\nAnn enters.",
+        "EXT. STREET - NIGHT\nBo waits.",
+    ]
+
+
+def test_heading_segments_survive_edits_elsewhere():
+    scenes = [f"INT. ROOM {i} - DAY\nSomething happens in room {i}." for i in range(6)]
+    before = segment_keys(split_script_segments("\n\n".join(scenes)))
+    edited = list(scenes)
+    edited[3] = edited[3] + " Then it rains."
+    after = segment_keys(split_script_segments("\n\n".join(edited)))
+    assert [a == b for a, b in zip(before, after)] == [True, True, True, False, True, True]
+
+
+def test_paragraph_segments_respect_size_bounds():
+    segments = split_script_segments("\n\n".join(paragraphs(60)))
+    assert all(len(segment) <= server.SEGMENT_MAX_CHARS + 250 for segment in segments)
+    assert all(len(segment) >= server.SEGMENT_MIN_CHARS for segment in segments[:-1])
+
+
+def test_paragraph_edit_only_touches_nearby_segments():
+    original = paragraphs(60)
+    before = segment_keys(split_script_segments("\n\n".join(original)))
+    edited = list(original)
+    edited[30] = edited[30] + " An edit."
+    after = segment_keys(split_script_segments("\n\n".join(edited)))
+    assert len(set(before) - set(after)) <= 2
+    assert before[:3] == after[:3] and before[-3:] == after[-3:]
+
+
+def test_keys_ignore_whitespace_and_number_repeats():
+    keys = segment_keys(["a  b\nc", "a b c", "d"])
+    assert keys[0].split(":")[0] == keys[1].split(":")[0]
+    assert keys[0].endswith(":1") and keys[1].endswith(":2")
+    assert len(set(keys)) == 3
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from server import SessionCache, User
+
+EXPIRES = datetime.now(timezone.utc) + timedelta(days=1)
+
+
+def user(user_id):
+    return User(user_id=user_id, email=f"{user_id}@example.com", name=user_id)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = SessionCache(ttl_seconds=60, max_entries=10)
+    cache.put("t1", user("u1"), EXPIRES, "s1")
+    clock[0] += 59
+    assert cache.get("t1")["user"].user_id == "u1"
+    clock[0] += 2
+    assert cache.get("t1") is None
+    # The indexes are cleaned up along with the entry
+    assert cache._tokens_by_user == {} and cache._tokens_by_session_id == {}
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = SessionCache(ttl_seconds=60, max_entries=2)
+    cache.put("t1", user("u1"), EXPIRES)
+    cache.put("t2", user("u2"), EXPIRES)
+    cache.get("t1")
+    cache.put("t3", user("u3"), EXPIRES)
+    assert cache.get("t2") is None
+    assert cache.get("t1") is not None and cache.get("t3") is not None
+
+
+def test_invalidation_by_user_and_session_id(clock):
+    cache = SessionCache(ttl_seconds=60, max_entries=10)
+    cache.put("t1", user("u1"), EXPIRES, "s1")
+    cache.put("t2", user("u1"), EXPIRES, "s2")
+    cache.put("t3", user("u2"), EXPIRES, "s3")
+
+    cache.invalidate_session_id("s3")
+    assert cache.get("t3") is None
+    cache.invalidate_user("u1")
+    assert cache.get("t1") is None and cache.get("t2") is None
+
+
+def test_clear_drops_the_lookup_indexes(clock):
+    cache = SessionCache(ttl_seconds=60, max_entries=10)
+    cache.put("t1", user("u1"), EXPIRES, "s1")
+    cache.clear()
+    assert cache._tokens_by_user == {} and cache._tokens_by_session_id == {}
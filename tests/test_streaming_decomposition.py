@@ -0,0 +1,164 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+from server import StreamingDecompositionParser
+
+RESPONSE = json.dumps({
+    "scenes": [
+        {"scene_number": 1, "description": "A dark {room}", "characters": ["Ann"],
+         "setting": "Attic", "action_summary": 'She says "hi \\ there"'},
+        {"scene_number": 2, "description": "Street at night", "characters": ["Ann", "Bo"],
+         "setting": "City", "action_summary": "They run"},
+    ],
+    "characters": [
+        {"name": "Ann", "appearance": "tall", "clothing": "coat [red]", "age": "30", "style": "noir"},
+        {"name": "Bo", "appearance": "short", "clothing": "hat", "age": "40", "style": "noir"},
+    ]
+}, indent=2)
+
+
+def parse(chunks):
+    parser = StreamingDecompositionParser()
+    return [item for chunk in chunks for item in parser.feed(chunk)]
+
+
+def test_parses_whole_response():
+    items = parse([RESPONSE])
+    assert [kind for kind, _ in items] == ["scene", "scene", "character", "character"]
+    assert items[0][1]["description"] == "A dark {room}"
+    assert items[0][1]["action_summary"] == 'She says "hi \\ there"'
+    assert items[2][1]["clothing"] == "coat [red]"
+
+
+def test_any_chunk_split_gives_the_same_items():
+    expected = parse([RESPONSE])
+    assert parse(list(RESPONSE)) == expected
+    for size in (2, 7, 31):
+        assert parse([RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]) == expected
+
+
+def test_yields_each_element_as_soon_as_it_closes():
+    parser = StreamingDecompositionParser()
+    first_end = RESPONSE.index('"Attic"')
+    assert list(parser.feed(RESPONSE[:first_end])) == []
+    assert [kind for kind, _ in parser.feed(RESPONSE[first_end:RESPONSE.index("Street")])] == ["scene"]
+
+
+def test_ignores_markdown_fence_and_nested_arrays():
+    text = '```json\n{"scenes": [{"description": "x", "extra": {"scenes": [{"a": 1}]}}], "characters": []}\n```'
+    assert parse([text]) == [("scene", {"description": "x", "extra": {"scenes": [{"a": 1}]}})]
+
+
+def test_skips_malformed_element_and_keeps_going():
+    text = '{"scenes": [{"description": "bad" "x"}, {"description": "good"}], "characters": [{"name": "Ann"}]}'
+    assert parse([text]) == [("scene", {"description": "good"}), ("character", {"name": "Ann"})]
+
+
+def test_other_top_level_keys_are_ignored():
+    text = '{"notes": [{"description": "no"}], "scenes": [{"description": "yes"}]}'
+    assert parse([text]) == [("scene", {"description": "yes"})]
+
+
+def test_chunked_items_come_out_in_script_order(monkeypatch):
+    delays = {"first": 0.05, "second": 0.0}
+
+    async def fake_chunk_items(api_key, text, use_cache):
+        await asyncio.sleep(delays[text])
+        yield "scene", {"description": f"{text} a"}
+        yield "scene", {"description": f"{text} b"}
+
+    monkeypatch.setattr(server, "stream_chunk_items", fake_chunk_items)
+
+    async def collect():
+        return [item async for item in server.chunked_decomposition_items("key", ["first", "second"], True)]
+
+    items = asyncio.run(collect())
+    assert [(index, item["description"]) for index, _, item in items] == [
+        (0, "first a"), (0, "first b"), (1, "second a"), (1, "second b")
+    ]
+
+
+def test_chunked_items_raise_a_chunk_failure(monkeypatch):
+    async def fake_chunk_items(api_key, text, use_cache):
+        if text == "bad":
+            raise server.ProviderUnavailable()
+        yield "scene", {"description": text}
+
+    monkeypatch.setattr(server, "stream_chunk_items", fake_chunk_items)
+
+    async def collect():
+        seen = []
+        try:
+            async for _, _, item in server.chunked_decomposition_items("key", ["good", "bad"], True):
+                seen.append(item["description"])
+        except server.ProviderUnavailable:
+            return seen, True
+        return seen, False
+
+    assert asyncio.run(collect()) == (["good"], True)
+
+
+def test_complete_only_after_the_whole_response():
+    parser = StreamingDecompositionParser()
+    cut = RESPONSE.index("Street")
+    list(parser.feed(RESPONSE[:cut]))
+    assert not parser.complete
+    list(parser.feed(RESPONSE[cut:]))
+    assert parser.complete
+
+
+def test_truncated_response_is_incomplete():
+    parser = StreamingDecompositionParser()
+    items = list(parser.feed(RESPONSE[:RESPONSE.rindex('"Bo"')]))
+    assert [kind for kind, _ in items] == ["scene", "scene", "character"]
+    assert "scenes" in parser.closed_arrays and not parser.closed
+    assert not parser.complete
+
+
+def test_skipped_element_makes_response_incomplete():
+    parser = StreamingDecompositionParser()
+    list(parser.feed('{"scenes": [{"description": "bad" "x"}, {"description": "good"}], "characters": []}'))
+    assert parser.closed and parser.skipped == 1
+    assert not parser.complete
+
+
+def stream_text(monkeypatch, text, stored):
+    async def fake_stream(api_key, prompt):
+        for i in range(0, len(text), 16):
+            yield text[i:i + 16]
+
+    async def fake_store(cache_key, result):
+        stored.append(result)
+
+    monkeypatch.setattr(server, "stream_gemini_text", fake_stream)
+    monkeypatch.setattr(server, "store_decomposition", fake_store)
+
+    async def collect():
+        return [item async for item in server.stream_chunk_items("key", "script", False)]
+
+    return asyncio.run(collect())
+
+
+def test_chunk_items_cache_a_complete_response(monkeypatch):
+    stored = []
+    items = stream_text(monkeypatch, RESPONSE, stored)
+    assert len(items) == 4
+    assert len(stored) == 1 and len(stored[0]["scenes"]) == 2
+
+
+def test_chunk_items_reject_a_truncated_response(monkeypatch):
+    stored = []
+    truncated = RESPONSE[:RESPONSE.index("Street")]
+    with pytest.raises(server.HTTPException, match="incomplete"):
+        stream_text(monkeypatch, truncated, stored)
+    assert stored == []
+
+
+def test_chunk_items_reject_a_response_without_scenes(monkeypatch):
+    stored = []
+    with pytest.raises(server.HTTPException, match="no scenes"):
+        stream_text(monkeypatch, '{"scenes": [], "characters": []}', stored)
+    assert stored == []
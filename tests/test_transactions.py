@@ -0,0 +1,61 @@
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+import server
+
+
+class FakeSession:
+    """Session whose with_transaction retries the callback once, like a TransientTransactionError would"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.attempts = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def with_transaction(self, write):
+        if self.error:
+            raise self.error
+        for _ in range(2):
+            self.attempts += 1
+            await write(self)
+
+
+class FakeClient:
+    def __init__(self, session):
+        self.session = session
+
+    async def start_session(self):
+        return self.session
+
+
+def test_writes_run_through_with_transaction(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(server, "client", FakeClient(session))
+    monkeypatch.setattr(server, "_transactions_supported", None)
+    sessions = []
+
+    async def write(s):
+        sessions.append(s)
+
+    asyncio.run(server.run_in_transaction(write))
+    assert sessions == [session, session]
+    assert server._transactions_supported is True
+
+
+def test_standalone_mongod_falls_back_to_plain_writes(monkeypatch):
+    monkeypatch.setattr(server, "client", FakeClient(FakeSession(OperationFailure("no replica set", code=20))))
+    monkeypatch.setattr(server, "_transactions_supported", None)
+    sessions = []
+
+    async def write(s):
+        sessions.append(s)
+
+    asyncio.run(server.run_in_transaction(write))
+    assert sessions == [None]
+    assert server._transactions_supported is False